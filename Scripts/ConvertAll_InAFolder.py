@@ -0,0 +1,547 @@
+# Run by:  python ConvertAll_InAFolder.py
+#! Requires ffmpeg and ffprobe (video and images) and vgmstream-cli (WEM/XWM audio), depending on which files are converted.
+# Converts all files in a folder (recursively) with the converters in CONVERTERS: .mkv/.avi -> .mp4, .wem/.xwm -> .wav,
+# and .webp -> .png (or .gif when animated). A mixed folder is walked once and all its files are converted in one concurrent pass.
+# Supports retries, optional deletion or moving of source files, and logs every conversion.
+
+# Imports
+import json
+import os
+import shutil
+import subprocess
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+
+#! ==========<  CONFIG  >==========
+# Set the path to scan for files.
+#INPUT_PATH = r"C:\Path\To\Folder"
+INPUT_PATH = r"C:\Path\To\Folder"
+
+# Set the output path for converted files (same folder structure as INPUT_PATH). If empty, files are converted next to the originals.
+OUTPUT_PATH = r""
+
+#@ Input extensions to convert in this run (keys of CONVERTERS below).
+CONVERT_EXTENSIONS = ['.mkv', '.avi', '.wem', '.xwm', '.webp']
+
+#! Toggle this (True / False) to (delete / move or keep), respectively.
+DELETE_AFTER = False
+
+# If MOVE_FILE_PATH is set, files are moved there. If empty, files stay unless DELETE_AFTER is True.
+MOVE_FILE_PATH = r""
+
+#@ Set to True to convert largest files first (all file types sorted together). False sorts smallest first.
+CONVERT_LARGEST_FIRST = True
+
+# Number of extra tries for a file whose conversion failed. Partial output of a failed try is removed first.
+RETRY_COUNT = 1
+
+#@ Number of conversions run at the same time. 0 = cores // THREADS_PER_JOB (or 1 job if THREADS_PER_JOB is also 0).
+CONVERT_JOBS = 2
+
+# Threads each ffmpeg job may use (ffmpeg -threads). 0 = split the cores evenly between the jobs.
+# The split always keeps (jobs x threads) <= cores. Largest-first ordering starts the biggest jobs first, which shortens the tail.
+THREADS_PER_JOB = 0
+
+# Memory cap for all running jobs together (MB). Each converter has a memoryMB estimate for one job, and a job only starts
+# once its estimate fits next to the running ones (a single job always runs). Set to None for no cap.
+MAX_TOTAL_MEMORY_MB = None
+
+#@ Inspect each MKV with ffprobe and stream-copy the video/audio that MP4 already supports instead of re-encoding it.
+# Only the streams that need it are re-encoded. A copy that ffmpeg rejects falls back to a full re-encode.
+REMUX_COMPATIBLE = True
+
+# Codecs (ffprobe codec_name) that are copied into the MP4 as-is when REMUX_COMPATIBLE is True.
+MP4_VIDEO_CODECS = {'h264', 'hevc', 'mpeg4', 'av1', 'vp9'}
+MP4_AUDIO_CODECS = {'aac', 'mp3', 'ac3', 'eac3', 'opus', 'flac', 'alac'}
+
+# Path to vgmstream-cli.exe (required for decoding .wem and .xwm files).
+# Download from: https://github.com/vgmstream/vgmstream
+VGMSTREAM_CLI = r"C:\\Programs\\CLI-Tools\\vgmstream\\vgmstream-cli.exe"
+
+# Converter profiles by input extension. command is the argument list to run. The placeholders '{input}', '{output}' and
+# '{threads}' must be whole arguments. memoryMB is the expected peak memory of one job (see MAX_TOTAL_MEMORY_MB).
+# .mkv files are probed first (see REMUX_COMPATIBLE), and animated .webp files use animatedCommand/animatedOutputExtension.
+CONVERTERS = {
+    '.mkv': {
+        'outputExtension': '.mp4',
+        'command': ['ffmpeg', '-i', '{input}', '-c:v', 'libx264', '-c:a', 'aac', '-threads', '{threads}', '{output}'],
+        'memoryMB': 1024
+    },
+    '.avi': {
+        'outputExtension': '.mp4',
+        'command': ['ffmpeg', '-i', '{input}', '-c:v', 'libx264', '-preset', 'medium', '-crf', '23', '-c:a', 'aac', '-b:a', '192k', '-threads', '{threads}', '{output}'],
+        'memoryMB': 1024
+    },
+    '.wem': {
+        'outputExtension': '.wav',
+        'command': [VGMSTREAM_CLI, '-o', '{output}', '{input}'],
+        'memoryMB': 64
+    },
+    '.xwm': {
+        'outputExtension': '.wav',
+        'command': [VGMSTREAM_CLI, '-o', '{output}', '{input}'],
+        'memoryMB': 64
+    },
+    #! GIF creation is BROKEN, NEED TO FIX IT BY USING A DIFFERENT PACKAGE.
+    '.webp': {
+        'outputExtension': '.png',
+        'command': ['ffmpeg', '-i', '{input}', '-y', '{output}'],
+        'animatedOutputExtension': '.gif',
+        'animatedCommand': ['ffmpeg', '-f', 'webp', '-i', '{input}', '-loop', '0', '-y', '{output}'],
+        'memoryMB': 256
+    }
+}
+
+# Set the log file config.
+# LOG_PATH: Folder to save logs. Supports both absolute and relative paths — e.g. 'Logs', './Logs', '../Logs', or 'D:/Logs/'.
+#           Set to None or '' to save the log in the same directory as this script.
+# LOG_NAME: File name for the log. Automatically increments to avoid overwriting existing files.
+USE_LOG_FILE = True  #! Enable or disable log file saving entirely.
+LOG_PATH = 'Logs'
+LOG_NAME = 'ConvertAll.txt'
+
+# Clear the console every time you run the script?
+CLEAR_CONSOLE = True
+if CLEAR_CONSOLE: os.system('cls' if os.name == 'nt' else 'clear')
+
+# Enables global use of LOG() without needing to pass createLogger() or logFile between functions.
+LOG = lambda *args, **kwargs: None
+#! ================================
+
+
+def getNextLogFilePath(logFolder, logFileName):
+    # Skip creating log path if logging is disabled.
+    if not USE_LOG_FILE:
+        return None
+
+    if logFolder:
+        logPath = os.path.abspath(logFolder)
+    else:
+        logPath = os.path.dirname(os.path.abspath(__file__))
+
+    os.makedirs(logPath, exist_ok=True)
+    baseName, ext = os.path.splitext(logFileName)
+    logNumber = 1
+
+    while True:
+        fileName = f'{baseName}_{logNumber}{ext}'
+        fullLogPath = os.path.join(logPath, fileName)
+
+        if not os.path.exists(fullLogPath):
+            return fullLogPath
+
+        logNumber += 1
+
+
+def logMsg(msg, printMsg=False, logFile=None, skipLogFile=False):
+    # Optional: Print to console (default: False).
+    if printMsg:
+        print(msg)
+
+    # Optional: Skip log file (default: False).
+    if USE_LOG_FILE and not skipLogFile and logFile:
+        with open(logFile, 'a', encoding='utf-8') as f:
+            f.write(msg + '\n')
+
+
+def createLogger(logFile):
+    """
+    Returns a logging function with the given log file pre-attached.
+    This allows using LOG(msg) globally without passing the log file into every call.
+    Respects USE_LOG_FILE automatically.
+    """
+    return lambda msg, printMsg=False, skipLogFile=False: logMsg(msg, printMsg, logFile, skipLogFile)
+
+
+def getFileSize(filePath):
+    size = os.path.getsize(filePath)
+
+    if size < 1024:
+        return f'{size} B'
+    elif size < 1024 ** 2:
+        return f'{size / 1024:.2f} KB'
+    elif size < 1024 ** 3:
+        return f'{size / 1024 ** 2:.2f} MB'
+
+    return f'{size / 1024 ** 3:.2f} GB'
+
+
+def collectFilesToProcess(inPath, extensions):
+    # One walk for every converter. Files of all types are sorted by size together.
+    files = []
+
+    for root, _, fileNames in os.walk(inPath):
+        for file in fileNames:
+            extension = os.path.splitext(file)[1].lower()
+
+            if extension in extensions:
+                filePath = os.path.join(root, file)
+                files.append({
+                    'path': filePath,
+                    'extension': extension,
+                    'bytes': os.path.getsize(filePath),
+                    'size': getFileSize(filePath)
+                })
+
+    return sorted(files, key=lambda x: x['bytes'], reverse=CONVERT_LARGEST_FIRST)
+
+
+def skipDuplicateOutputs(files, inPath, outPath):
+    # Two inputs can map to the same output (foo.mkv and foo.avi -> foo.mp4, voice.wem and voice.xwm -> voice.wav).
+    # Only the first one (in conversion order) is converted. The others are skipped, so no job overwrites another job's
+    # output and no original is deleted or moved after its output was replaced. Animated .webp files may write
+    # animatedOutputExtension instead, so every output a converter can write counts.
+    claimed = {}
+    keptFiles = []
+
+    for fileInfo in files:
+        converter = CONVERTERS[fileInfo['extension']]
+        outputExtensions = { converter['outputExtension'], converter.get('animatedOutputExtension', converter['outputExtension']) }
+        outputPaths = { os.path.normcase(getOutputPath(fileInfo['path'], inPath, outPath, extension)) for extension in outputExtensions }
+        owner = next((claimed[outputPath] for outputPath in outputPaths if outputPath in claimed), None)
+
+        if owner:
+            LOG(f'[SKIPPED] Same output as {owner.replace("\\", "/")}  ||  {fileInfo["path"].replace("\\", "/")}', True)
+            continue
+
+        for outputPath in outputPaths:
+            claimed[outputPath] = fileInfo['path']
+
+        keptFiles.append(fileInfo)
+
+    return keptFiles
+
+
+def getJobPlan(totalFiles):
+    # Returns (jobs, threads): how many conversions run at once and the -threads value given to each ffmpeg job.
+    # jobs x threads never exceeds the machine's cores.
+    cores = os.cpu_count() or 1
+
+    if CONVERT_JOBS:
+        jobs = CONVERT_JOBS
+    elif THREADS_PER_JOB:
+        jobs = cores // THREADS_PER_JOB
+    else:
+        jobs = 1
+
+    jobs = max(1, min(jobs, cores, totalFiles))
+    threads = min(THREADS_PER_JOB or cores, cores // jobs)
+
+    return jobs, max(1, threads)
+
+
+def reserveMemory(memoryBudget, memoryMB):
+    # Blocks until the job's memory estimate fits under MAX_TOTAL_MEMORY_MB. A job always runs if nothing else is running.
+    with memoryBudget['condition']:
+        while MAX_TOTAL_MEMORY_MB and memoryBudget['used'] and memoryBudget['used'] + memoryMB > MAX_TOTAL_MEMORY_MB:
+            memoryBudget['condition'].wait()
+
+        memoryBudget['used'] += memoryMB
+
+
+def releaseMemory(memoryBudget, memoryMB):
+    with memoryBudget['condition']:
+        memoryBudget['used'] -= memoryMB
+        memoryBudget['condition'].notify_all()
+
+
+def fillCommand(command, inputPath, outputPath, threads):
+    values = { '{input}': inputPath, '{output}': outputPath, '{threads}': str(threads) }
+
+    return [values.get(arg, arg) for arg in command]
+
+
+def getOutputPath(inputPath, inPath, outPath, outputExtension):
+    # Next to the original, or at the same relative path under outPath.
+    if outPath:
+        return os.path.join(outPath, os.path.splitext(os.path.relpath(inputPath, inPath))[0] + outputExtension)
+
+    return os.path.splitext(inputPath)[0] + outputExtension
+
+
+def getDefaultAttempts(inputPath, converter):
+    # Returns the commands to try in order as [(convertPath, command, outputExtension), ...]. The first that works is kept.
+    return [('convert', converter['command'], converter['outputExtension'])]
+
+
+def probeStreams(inputPath):
+    # Returns [(codecType, codecName), ...] for the file's streams, or None if ffprobe fails.
+    # Cover art (attached pictures) is skipped, since ffmpeg doesn't pick it for the MP4 by default.
+    try:
+        result = subprocess.run(
+            ['ffprobe', '-v', 'error', '-show_entries', 'stream=codec_type,codec_name:stream_disposition=attached_pic', '-of', 'json', inputPath],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+
+        if result.returncode != 0:
+            return None
+
+        streams = json.loads(result.stdout.decode('utf-8', errors='ignore')).get('streams', [])
+    except Exception:
+        return None
+
+    return [
+        (stream.get('codec_type'), stream.get('codec_name'))
+        for stream in streams
+        if not stream.get('disposition', {}).get('attached_pic')
+    ]
+
+
+def setCodec(command, flag, codec):
+    # Replaces the value after flag (e.g. '-c:v') in a copy of command.
+    command = list(command)
+    command[command.index(flag) + 1] = codec
+
+    return command
+
+
+def getMkvAttempts(inputPath, converter):
+    # Copies the streams MP4 already supports and re-encodes the rest, with a full re-encode as the fallback.
+    command = converter['command']
+    outputExtension = converter['outputExtension']
+
+    if not REMUX_COMPATIBLE:
+        return [('re-encode', command, outputExtension)]
+
+    streams = probeStreams(inputPath)
+
+    if streams is None:
+        return [('re-encode (ffprobe failed)', command, outputExtension)]
+
+    videoCodecs = { codecName for codecType, codecName in streams if codecType == 'video' }
+    audioCodecs = { codecName for codecType, codecName in streams if codecType == 'audio' }
+    copyVideo = videoCodecs <= MP4_VIDEO_CODECS
+    copyAudio = audioCodecs <= MP4_AUDIO_CODECS
+    codecList = '/'.join(sorted(videoCodecs | audioCodecs))
+
+    if not copyVideo and not copyAudio:
+        return [(f're-encode ({codecList})', command, outputExtension)]
+
+    copyCommand = command
+
+    if copyVideo:
+        copyCommand = setCodec(copyCommand, '-c:v', 'copy')
+
+        # Copied HEVC needs the hvc1 tag to play in most MP4 players.
+        if 'hevc' in videoCodecs:
+            tagAt = copyCommand.index('-c:v') + 2
+            copyCommand = copyCommand[:tagAt] + ['-tag:v', 'hvc1'] + copyCommand[tagAt:]
+
+    if copyAudio:
+        copyCommand = setCodec(copyCommand, '-c:a', 'copy')
+
+    if copyVideo and copyAudio:
+        convertPath = f'remux, stream copy ({codecList})'
+    elif copyVideo:
+        convertPath = f'copy video, re-encode audio ({codecList})'
+    else:
+        convertPath = f're-encode video, copy audio ({codecList})'
+
+    # Some streams can't be copied as-is (e.g. missing timestamps).
+    return [(convertPath, copyCommand, outputExtension), (f'{convertPath} failed, re-encoded', command, outputExtension)]
+
+
+def isAnimatedWebp(filePath):
+    # Uses ffprobe to detect if the .webp file contains animation frames.
+    try:
+        result = subprocess.run(
+            [
+                'ffprobe', '-v', 'error',
+                '-count_frames',
+                '-select_streams', 'v:0',
+                '-show_entries', 'stream=nb_read_frames',
+                '-of', 'default=noprint_wrappers=1:nokey=1',
+                filePath
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        output = result.stdout.decode('utf-8').strip()
+
+        return int(output) > 1
+    except Exception:
+        return False  # Assume static if ffprobe fails.
+
+
+def getWebpAttempts(inputPath, converter):
+    # Static .webp -> .png, animated .webp -> .gif.
+    if isAnimatedWebp(inputPath):
+        return [('animated', converter['animatedCommand'], converter['animatedOutputExtension'])]
+
+    return [('static', converter['command'], converter['outputExtension'])]
+
+
+# Converters that pick their command per file. Every other converter uses getDefaultAttempts().
+CONVERTER_HOOKS = {
+    '.mkv': getMkvAttempts,
+    '.webp': getWebpAttempts
+}
+
+
+def runConverter(fileInfo, inPath, outPath, threads, memoryBudget):
+    # Runs in a worker thread. Only runs the external tools. Logging and the original file are handled in the main thread.
+    # Returns { 'success', 'outputPath', 'convertPath', 'tries', 'error' }.
+    inputPath = fileInfo['path']
+    converter = CONVERTERS[fileInfo['extension']]
+    getAttempts = CONVERTER_HOOKS.get(fileInfo['extension'], getDefaultAttempts)
+    outcome = { 'success': False, 'outputPath': None, 'convertPath': None, 'tries': 0, 'error': '' }
+
+    reserveMemory(memoryBudget, converter['memoryMB'])
+
+    try:
+        fileInfo['startTime'] = datetime.now().strftime('%I:%M:%S:%f %p')
+        attempts = getAttempts(inputPath, converter)
+
+        for _ in range(RETRY_COUNT + 1):
+            for convertPath, command, outputExtension in attempts:
+                outputPath = getOutputPath(inputPath, inPath, outPath, outputExtension)
+                outputExisted = os.path.exists(outputPath)
+                outcome.update({ 'outputPath': outputPath, 'convertPath': convertPath, 'tries': outcome['tries'] + 1 })
+                os.makedirs(os.path.dirname(outputPath), exist_ok=True)
+
+                try:
+                    # stdin is closed so tools that ask before overwriting fail instead of waiting for input.
+                    result = subprocess.run(
+                        fillCommand(command, inputPath, outputPath, threads),
+                        stdin=subprocess.DEVNULL,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE
+                    )
+                    outcome['error'] = result.stderr.decode('utf-8', errors='ignore')
+                    success = result.returncode == 0 and os.path.exists(outputPath)
+                except OSError as e:
+                    outcome['error'] = str(e)
+                    success = False
+
+                if success:
+                    outcome['success'] = True
+
+                    return outcome
+
+                # Only remove output this try created, never a file that was already there.
+                if not outputExisted and os.path.exists(outputPath):
+                    try:
+                        os.remove(outputPath)
+                    except OSError as e:
+                        outcome['error'] += f'\nCould not remove partial output {outputPath}: {e}'
+
+        return outcome
+    finally:
+        fileInfo['endTime'] = datetime.now().strftime('%I:%M:%S:%f %p')
+        releaseMemory(memoryBudget, converter['memoryMB'])
+
+
+def handleOriginalFile(inputPath, inputName, indexStr):
+    try:
+        if DELETE_AFTER:
+            os.remove(inputPath)
+            LOG(f'    Deleted original {inputName}: {indexStr}  ||  {inputPath.replace("\\", "/")}')
+        elif MOVE_FILE_PATH:
+            dest = os.path.abspath(MOVE_FILE_PATH)
+            os.makedirs(dest, exist_ok=True)
+            shutil.move(inputPath, os.path.join(dest, os.path.basename(inputPath)))
+            LOG(f'    Moved original {inputName} to: {indexStr}  ||  {dest.replace("\\", "/")}')
+        else:
+            LOG(f'    Kept original {inputName}: {indexStr}  ||  {inputPath.replace("\\", "/")}')
+    except Exception as e:
+        LOG(f'    [ERROR] Error handling original file: {e}', True)
+
+
+def logConvertedFile(fileInfo, outcome, indexStr):
+    # Logs one finished job as a single block, so blocks of jobs running at the same time don't interleave.
+    # Only one line per file goes to the console. Printing more slows down runs over many small files.
+    inputPath = fileInfo['path']
+    inputName = fileInfo['extension'][1:].upper()
+    startTime = fileInfo['startTime']
+    endTime = fileInfo['endTime']
+    triesStr = f'  ||  Tries: {outcome["tries"]}' if outcome['tries'] > 1 else ''
+
+    LOG(f'Processing: {indexStr}')
+    LOG(f'    Start: {startTime}  ||  {inputName} Size: {fileInfo["size"]}  ||  {inputPath.replace("\\", "/")}')
+
+    if outcome['success']:
+        outputPath = outcome['outputPath']
+        outputName = os.path.splitext(outputPath)[1][1:].upper()
+        outputSize = getFileSize(outputPath)
+
+        LOG(f'{indexStr} - Start: {startTime}  ||  End: {endTime}  ||  {inputName}: {fileInfo["size"]} -> {outputName}: {outputSize}  ||  {outputPath.replace("\\", "/")}', True, skipLogFile=True)
+        LOG(f'    [SUCCESS] End: {endTime}  ||  Path: {outcome["convertPath"]}{triesStr}  ||  {inputPath.replace("\\", "/")}')
+        LOG(f'    File created: {endTime}  ||  {outputName} Size: {outputSize}  ||  {outputPath.replace("\\", "/")}')
+        handleOriginalFile(inputPath, inputName, indexStr)
+    else:
+        LOG(f'{indexStr} - [ERROR] Conversion failed{triesStr}  ||  {inputPath.replace("\\", "/")}', True, skipLogFile=True)
+        LOG(f'    [ERROR] Conversion failed: {inputPath}{triesStr}:\n{outcome["error"]}')
+
+    LOG('-----')
+
+
+def convertFiles(inPath, outPath):
+    files = collectFilesToProcess(inPath, [extension.lower() for extension in CONVERT_EXTENSIONS])
+    skippedFiles = len(files)
+    files = skipDuplicateOutputs(files, inPath, outPath)
+    skippedFiles -= len(files)
+    totalFiles = len(files)
+    jobs, threads = getJobPlan(totalFiles)
+    memoryBudget = { 'condition': threading.Condition(), 'used': 0 }
+    totals = {}
+    successes = {}
+
+    for fileInfo in files:
+        totals[fileInfo['extension']] = totals.get(fileInfo['extension'], 0) + 1
+
+    typeCounts = ', '.join(f'{extension[1:].upper()}: {count}' for extension, count in sorted(totals.items()))
+    skippedStr = f'  ||  Skipped (same output): {skippedFiles}' if skippedFiles else ''
+    LOG(f'Total files to process: {totalFiles} ({typeCounts}){skippedStr}  ||  Jobs: {jobs} x {threads} threads\n', True)
+
+    # Jobs are submitted in the CONVERT_LARGEST_FIRST order and the pool starts them in that order.
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(runConverter, fileInfo, inPath, outPath, threads, memoryBudget): (index, fileInfo)
+            for index, fileInfo in enumerate(files, 1)
+        }
+
+        for future in as_completed(futures):
+            index, fileInfo = futures[future]
+            outcome = future.result()
+            logConvertedFile(fileInfo, outcome, f'{index:02}/{totalFiles:02}')
+
+            if outcome['success']:
+                successes[fileInfo['extension']] = successes.get(fileInfo['extension'], 0) + 1
+
+    LOG(f'\nTotal files processed: {totalFiles}, Successful: {sum(successes.values())}.', True)
+
+    for extension, count in sorted(totals.items()):
+        LOG(f'    {extension[1:].upper()}: {count} processed, {successes.get(extension, 0)} successful.', True)
+
+
+if __name__ == '__main__':
+    # Create log file first so we can log even if any script functions fail early.
+    logFile = getNextLogFilePath(LOG_PATH, LOG_NAME)
+    LOG = createLogger(logFile)
+
+    try:
+        LOG(f'[START] Script started at {datetime.now().strftime("%m/%d/%y %I:%M:%S:%f %p")}.\n', True)
+
+        convertFiles(INPUT_PATH, OUTPUT_PATH)
+
+        if USE_LOG_FILE:
+            LOG(f'\nLogs saved to "{logFile.replace("\\", "/")}"', True)
+            LOG(f'[END] Script completed at {datetime.now().strftime("%m/%d/%y %I:%M:%S %p")}.', True)
+        else:
+            LOG(f'\n[END] Script completed at {datetime.now().strftime("%m/%d/%y %I:%M:%S %p")}.', True)
+    except KeyboardInterrupt:
+        err = '[ERROR] Script interrupted by user (KeyboardInterrupt / CTRL+C).\n'
+        trace = traceback.format_exc()
+        LOG(err + trace, True)
+    except Exception:
+        err = '[ERROR] Unhandled Exception:\n'
+        trace = traceback.format_exc()
+        LOG(err + trace, True)
+    finally:
+        LOG(f'[FINAL] Script exited at {datetime.now().strftime("%m/%d/%y %I:%M:%S:%f %p")}.', True)
@@ -1,9 +1,20 @@
 # Run by:  python PrintPathTreeStructure.py
 
 # Imports
+import array
 import ctypes
+import fnmatch
+import heapq
+import json
 import os
+import pickle
+import queue
+import re
+import struct
+import sys
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 
@@ -13,6 +24,14 @@ DIRECTORY = ""
 # DIRECTORY_WINDOWS: Allows simple quick copy/paste from windows file explore. Prioritized over DIRECTORY if both valid paths.
 DIRECTORY_WINDOWS = r"C:\Path\To\Folder"
 
+# Batch mode: scan several root folders in one run. Used instead of DIRECTORY/DIRECTORY_WINDOWS when not empty.
+# Roots on different devices are scanned concurrently (one worker per device). Roots on the same device run one after
+# another so disks don't thrash. Each root gets its own output subfolder and a combined <OUTPUT_NAME>Index.txt is saved.
+BATCH_PATHS = [
+    #r"C:\Path\To\Folder",
+    #r"D:\Another\Folder",
+]
+
 #! Toggle this True/False to scan files or just folders in the given directory.
 # If True, it creates two output files instead of one (one with folders only, one with files and folders).
 SCAN_FILES = True
@@ -23,18 +42,71 @@ SHOW_FILE_SIZE = True
 #! Toggle this True/False to show root folder name or not inside the tree structure.
 SHOW_ROOT_FOLDER = True
 
+# How on-disk (allocated) sizes are measured. Options: 'auto', 'posix', 'windows', 'apparent'.
+# 'auto' picks 'windows' on Windows (cluster rounded, MFT aware) and 'posix' everywhere else (st_blocks * 512).
+# 'apparent' skips allocation lookups and reports the byte size as the disk size.
+DISK_USAGE_BACKEND = 'auto'
+
+#! Toggle this True/False to show a 'Unique:' disk size next to 'Disk:' in the tree (only used when SHOW_FILE_SIZE is True).
+# Hard-linked files (same device and inode) are counted once in the unique size, the first time they appear in the tree.
+# 'Disk:' keeps counting every path. NOTE: Only detected on POSIX. Windows directory listings do not report link counts.
+SHOW_UNIQUE_DISK_SIZE = True
+
 # Num of folders to search deep into given input path (0=full recursive, 1=just folders/files of input path, 2=folder/files of input path and their children but not deeper, 3=3 folders deep maximum)
+# NOTE: Totals are still for the whole tree. Folders cut off at the depth limit get a '+ N more items in M folders' line instead of their contents.
 DEPTH_SEARCH = 0
 DEBUG = False
 
+# Number of worker threads used to list folders. 1 = sequential scan. Higher values help on network shares and
+# NVMe arrays where per-folder latency dominates. The output is identical either way.
+SCAN_WORKERS = 1
+# If True (and SCAN_WORKERS > 1), also times a single-threaded scan and logs the speedup. This scans the tree twice.
+# NOTE: The single-threaded scan runs first, on the cold directory cache. The parallel scan then runs warm, so on a
+#       cold cache the real speedup is usually smaller than the one logged.
+COMPARE_SCAN_SPEED = False
+
+# Incremental scans for repeated runs over mostly unchanged trees. If True, every scan is saved to SNAPSHOT_NAME
+# (inside OUTPUT_PATH) and the next run reuses the saved listing of every folder whose modified time did not change,
+# so only changed folders are listed again. Unchanged folders still cost one stat each to check their modified time.
+# NOTE: A folder's modified time only changes when entries are added, removed, or renamed in it. Files edited in place
+# keep their old size in the snapshot until their folder changes. Delete the snapshot file to force a full scan.
+USE_SNAPSHOT = False
+SNAPSHOT_NAME = 'TreeSnapshot.pickle'
+
 # Set output path and file name.
 # OUTPUT_PATH NOTE: Allows absolute and relative folder paths. Examples: 'Output', './Output', '../Output', or 'D:/Output/'. All are valid.
 # OUTPUT_PATH NOTE: Set to None or '' to not have save file to any folder. It will just save the file to the same folder as the script.
 OUTPUT_PATH = 'Output'
 OUTPUT_NAME = 'TreeStructure.txt'
 
-
-# NOTE for IGNORE_LIST & ONLY_SELECT_LIST: Options: 'folder', 'file' (value can be file w/ extension or without), 'ext' OR 'extension'
+# Write buffer size (bytes) for the output files. Lines are streamed into the buffer as they are rendered.
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+# Machine readable exports of the full scanned tree (folders and files), saved next to the text output.
+# EXPORT_NDJSON: One JSON object per line (id, parentId, name, path, isDir, fileCount, actualSize, diskSize). Saved as <OUTPUT_NAME>.ndjson.
+# EXPORT_BINARY: Compact columnar file that loadBinaryTree() reads back with a few bulk reads (names are decoded on demand
+#                with getBinaryTreeName()). Saved as <OUTPUT_NAME>.bin.
+EXPORT_NDJSON = False
+EXPORT_BINARY = False
+
+# Diff mode: compare two saved NDJSON exports (see EXPORT_NDJSON) instead of scanning. Set both paths to enable.
+# The report of added, removed, and changed files/folders with size and file count deltas is saved as <OUTPUT_NAME>Diff.txt.
+# NOTE: Copy or rename the previous run's export first, since every run overwrites <OUTPUT_NAME>.ndjson.
+# NOTE: These are the .ndjson exports, not the SNAPSHOT_NAME pickle used by USE_SNAPSHOT.
+DIFF_OLD_EXPORT = ''
+DIFF_NEW_EXPORT = ''
+
+# Size summary of the N largest files and folders (by disk and actual size) and the N folders with the most files.
+# Collected while the scan aggregates folder totals. Saved as <OUTPUT_NAME>Largest.txt. Set to 0 to disable.
+TOP_N = 0
+
+
+# NOTE for IGNORE_LIST & ONLY_SELECT_LIST: Options: 'folder', 'file' (value can be file w/ extension or without), 'ext' OR 'extension', 'path'
+# NOTE: 'folder', 'file' and 'path' values may be globs (*, ?, [abc]). Example: { 'folder': '*.egg-info' } or { 'file': '*.tmp' }.
+# NOTE: 'folder' and 'file' values always match their exact name too, so { 'folder': 'Photos [2019]' } still matches that folder.
+# NOTE: 'path' globs match the full path with forward slashes, and * also matches across folders. Example: { 'path': '*/build/cache' }.
+#       In ONLY_SELECT_LIST, 'path' rules only select files. Folders are still selected by 'folder' rules alone.
+# NOTE: 'ext' values are matched case-insensitively against the name from a dot onward ('.py' or 'py', '.tar.gz' also works).
 # Define the list of folders and files to ignore.
 IGNORE_LIST = [
     { 'folder': '__pycache__' },
@@ -96,30 +168,41 @@ if 'DIRECTORY_WINDOWS' in locals() and DIRECTORY_WINDOWS:
     SELECT_PATH = DIRECTORY_WINDOWS
 elif 'DIRECTORY' in locals() and DIRECTORY:
     SELECT_PATH = DIRECTORY
-if not SELECT_PATH: raise ValueError('No valid directory path provided.')
-
-# Separate ignore rules and select rules.
-IGNORE_FOLDERS = set()
-IGNORE_FILES = set()
-IGNORE_EXTS = set()
-ONLY_FOLDERS = set()
-ONLY_FILES = set()
-ONLY_EXTS = set()
-for item in IGNORE_LIST:
-    if 'folder' in item:
-        IGNORE_FOLDERS.add(item['folder'])
-    elif 'file' in item:
-        IGNORE_FILES.add(item['file'])
-    elif 'ext' in item or 'extension' in item:
-        IGNORE_EXTS.add(item.get('ext') or item.get('extension'))
-
-for item in ONLY_SELECT_LIST:
-    if 'folder' in item:
-        ONLY_FOLDERS.add(item['folder'])
-    elif 'file' in item:
-        ONLY_FILES.add(item['file'])
-    elif 'ext' in item or 'extension' in item:
-        ONLY_EXTS.add(item.get('ext') or item.get('extension'))
+if not SELECT_PATH and not BATCH_PATHS and not (DIFF_OLD_EXPORT and DIFF_NEW_EXPORT): raise ValueError('No valid directory path provided.')
+
+# Compile ignore rules and select rules once. Exact names and extensions go into sets, globs into one combined regex per kind.
+IGNORE_RULES = { 'folders': set(), 'folderGlobs': [], 'files': set(), 'fileGlobs': [], 'exts': set(), 'pathGlobs': [] }
+ONLY_RULES = { 'folders': set(), 'folderGlobs': [], 'files': set(), 'fileGlobs': [], 'exts': set(), 'pathGlobs': [] }
+for ruleList, rules in ((IGNORE_LIST, IGNORE_RULES), (ONLY_SELECT_LIST, ONLY_RULES)):
+    for item in ruleList:
+        if 'folder' in item:
+            kind, value = 'folder', item['folder']
+        elif 'file' in item:
+            kind, value = 'file', item['file']
+        elif 'path' in item:
+            rules['pathGlobs'].append(item['path'].replace('\\', '/'))
+            continue
+        elif 'ext' in item or 'extension' in item:
+            ext = (item.get('ext') or item.get('extension')).lower()
+            rules['exts'].add(ext if ext.startswith('.') else '.' + ext)
+            continue
+        else:
+            continue
+
+        # Names are always matched exactly first, so a literal name such as 'Photos [2019]' still matches itself.
+        rules[kind + 's'].add(value)
+        if any(char in value for char in '*?['):
+            rules[kind + 'Globs'].append(value)
+
+    for kind in ('folder', 'file', 'path'):
+        globs = rules.pop(kind + 'Globs')
+        rules[kind + 'Regex'] = re.compile('|'.join(fnmatch.translate(glob) for glob in globs)) if globs else None
+
+    rules['hasFolderRules'] = bool(rules['folders'] or rules['folderRegex'])
+    rules['isEmpty'] = not (rules['hasFolderRules'] or rules['files'] or rules['fileRegex'] or rules['exts'] or rules['pathRegex'])
+
+# Cluster size per volume. Looked up once per volume instead of once per file.
+CLUSTER_SIZE_CACHE = {}
 #! ================================
 
 
@@ -179,9 +262,13 @@ def formatFileSize(bytes):
 
 
 def getClusterSize(path):
+    rootPath = os.path.splitdrive(path)[0] + '\\'
+
+    if rootPath in CLUSTER_SIZE_CACHE:
+        return CLUSTER_SIZE_CACHE[rootPath]
+
     sectorsPerCluster = ctypes.c_ulong()
     bytesPerSector = ctypes.c_ulong()
-    rootPath = os.path.splitdrive(path)[0] + '\\'
 
     res = ctypes.windll.kernel32.GetDiskFreeSpaceW(
         ctypes.c_wchar_p(rootPath),
@@ -193,11 +280,15 @@ def getClusterSize(path):
     if res == 0:
         raise ctypes.WinError()
 
-    return sectorsPerCluster.value * bytesPerSector.value
+    CLUSTER_SIZE_CACHE[rootPath] = sectorsPerCluster.value * bytesPerSector.value
+
+    return CLUSTER_SIZE_CACHE[rootPath]
 
 
-def getClusterAwareDiskSize(filePath, clusterSize):
-    actualSize = os.path.getsize(filePath)
+def getWindowsDiskSize(record):
+    filePath = record['path']
+    actualSize = record['actualSize']
+    clusterSize = getClusterSize(filePath)
 
     # Get reported on-disk size
     try:
@@ -224,77 +315,439 @@ def getClusterAwareDiskSize(filePath, clusterSize):
     return ((reportedSize + clusterSize - 1) // clusterSize) * clusterSize
 
 
-def isSelected(item, path=None):
-    isFolder = os.path.isdir(path) if path else False
+def getPosixDiskSize(record):
+    # Allocated size straight from the entry's stat data (st_blocks is always in 512-byte units).
+    return record['blocks'] * 512
+
+
+def getApparentDiskSize(record):
+    return record['actualSize']
+
+
+def getDiskUsageBackend(backendName):
+    # Returns the function used to measure a file's on-disk size from its entry record.
+    backends = {
+        'posix': getPosixDiskSize,
+        'windows': getWindowsDiskSize,
+        'apparent': getApparentDiskSize
+    }
+
+    if backendName == 'auto':
+        backendName = 'windows' if os.name == 'nt' else 'posix'
+
+    if backendName not in backends:
+        raise ValueError(f'Unknown DISK_USAGE_BACKEND: {backendName}')
+
+    return backends[backendName]
+
+
+def readEntry(entry, withStat=True):
+    # Compact per-entry record taken once from an os.DirEntry.
+    # is_dir() comes from the directory listing itself, and stat() is cached by the DirEntry, so this costs at most one stat.
+    record = {
+        'name': entry.name,
+        'path': entry.path,
+        'isDir': entry.is_dir(),
+        'actualSize': 0,
+        'blocks': 0,
+        'mtime': 0,
+        'inode': 0
+    }
+
+    if withStat:
+        st = entry.stat()
+        record['actualSize'] = 0 if record['isDir'] else st.st_size
+        record['blocks'] = getattr(st, 'st_blocks', 0)
+        record['mtime'] = st.st_mtime_ns
+
+        # Files with more than one link get (st_dev, st_ino) packed into one int, so shared inodes can be counted once.
+        if not record['isDir'] and st.st_nlink > 1:
+            record['inode'] = (st.st_dev << 64) | st.st_ino
+
+    return record
+
+
+def matchesName(names, regex, name):
+    return name in names or (regex is not None and regex.match(name) is not None)
+
+
+def matchesExtension(exts, name):
+    # Looks up every suffix that starts at a dot ('.gz', then '.tar.gz', ...) in the lowercased set.
+    if not exts:
+        return False
+
+    lowerName = name.lower()
+    index = lowerName.find('.')
+
+    while index != -1:
+        if lowerName[index:] in exts:
+            return True
+
+        index = lowerName.find('.', index + 1)
 
+    return False
+
+
+def matchesPath(regex, record):
+    return regex is not None and regex.match(record['path'].replace('\\', '/')) is not None
+
+
+def isSelected(record):
     # If there are no ONLY_* rules, allow everything.
-    if not ONLY_FOLDERS and not ONLY_FILES and not ONLY_EXTS:
+    rules = ONLY_RULES
+
+    if rules['isEmpty']:
         return True
 
+    item = record['name']
+
     # Allow all folders if no folder restriction is defined.
-    if isFolder:
-        return True if not ONLY_FOLDERS else item in ONLY_FOLDERS
+    if record['isDir']:
+        if not rules['hasFolderRules']:
+            return True
 
-    # File match (full name or ext).
-    if item in ONLY_FILES:
-        return True
+        return matchesName(rules['folders'], rules['folderRegex'], item)
 
-    if any(item.lower().endswith(ext) for ext in ONLY_EXTS):
-        return True
+    # File match (full name, ext, or path).
+    return matchesName(rules['files'], rules['fileRegex'], item) or matchesExtension(rules['exts'], item) or matchesPath(rules['pathRegex'], record)
 
-    return False
 
+def isIgnored(record):
+    # Ignored folders are dropped while listing their parent, so nothing below them is ever scanned.
+    rules = IGNORE_RULES
+    item = record['name']
 
-def isIgnored(item, path=None):
-    isFolder = os.path.isdir(path) if path else False
+    if record['isDir']:
+        return matchesName(rules['folders'], rules['folderRegex'], item) or matchesPath(rules['pathRegex'], record)
 
-    if isFolder and item in IGNORE_FOLDERS:
-        return True
+    return matchesName(rules['files'], rules['fileRegex'], item) or matchesExtension(rules['exts'], item) or matchesPath(rules['pathRegex'], record)
 
-    if not isFolder and item in IGNORE_FILES:
-        return True
 
-    if not isFolder and any(item.lower().endswith(ext) for ext in IGNORE_EXTS):
-        return True
+def createNode(record):
+    # One node per scanned folder/file, built on top of its entry record.
+    # Folder nodes hold the aggregated stats of everything below them.
+    node = dict(record)
+    node['fileCount'] = 0
+    node['folderCount'] = 0
+    node['diskSize'] = 0
+    node['uniqueDiskSize'] = 0
+    node['children'] = []
+
+    return node
 
-    return False
 
+def getSnapshotKey(collectSizes):
+    # Settings that change what a scan collects. A snapshot saved with different settings is not reused.
+    return (2, collectSizes, DISK_USAGE_BACKEND, repr(IGNORE_LIST), repr(ONLY_SELECT_LIST))
 
-def getRecursiveFolderStats(path):
-    fileCount = 0
-    byteSizeSum = 0
-    diskSizeSum = 0
+
+def loadSnapshot(snapshotPath, collectSizes):
+    # Returns the snapshot state used by the scan: 'old' holds the folders saved by the last run, 'new' collects
+    # the folders of this run. Each folder maps its path to (mtime, rows), one row per selected child entry.
+    snapshot = { 'old': {}, 'new': {} }
+
+    if not os.path.isfile(snapshotPath):
+        LOG('[SNAPSHOT] No snapshot found. Running a full scan.', True)
+        return snapshot
 
     try:
-        entries = os.listdir(path)
-        clusterSize = getClusterSize(path)
+        with open(snapshotPath, 'rb') as f:
+            key, folders = pickle.load(f)
     except Exception as e:
-        LOG(f'[ACCESS ERROR] Cannot read {path} - {e}', True)
-        return 0, 0, 0
+        LOG(f'[SNAPSHOT] Cannot read {snapshotPath} - {e}. Running a full scan.', True)
+        return snapshot
+
+    if key != getSnapshotKey(collectSizes):
+        LOG('[SNAPSHOT] Snapshot was saved with different settings. Running a full scan.', True)
+        return snapshot
+
+    snapshot['old'] = folders
+    LOG(f'[SNAPSHOT] Loaded {len(folders):,} folders from {snapshotPath}', True)
+
+    return snapshot
+
+
+def saveSnapshot(snapshotPath, collectSizes, snapshot):
+    # Written to a temporary file first so an interrupted run never leaves a broken snapshot behind.
+    tempPath = snapshotPath + '.tmp'
+
+    with open(tempPath, 'wb') as f:
+        pickle.dump((getSnapshotKey(collectSizes), snapshot['new']), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    os.replace(tempPath, snapshotPath)
+
+    reused = sum(1 for path, folder in snapshot['new'].items() if snapshot['old'].get(path) is folder)
+    LOG(f'[SNAPSHOT] Saved {len(snapshot["new"]):,} folders ({reused:,} reused unchanged) to:\n\t{snapshotPath}', True)
+
+
+def readFolderFromSnapshot(node, snapshot):
+    # Rebuilds a folder's child nodes from the snapshot if the folder's modified time is unchanged.
+    # Only subfolders are stat'ed (to get their own modified time). Returns None if the folder has to be listed again.
+    folder = snapshot['old'].get(node['path'])
+
+    if folder is None or folder[0] != node['mtime']:
+        return None
+
+    children = []
+
+    for name, isDir, actualSize, blocks, mtime, inode, diskSize in folder[1]:
+        path = os.path.join(node['path'], name)
+
+        if isDir:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                return None
+
+        child = createNode({
+            'name': name,
+            'path': path,
+            'isDir': isDir,
+            'actualSize': actualSize,
+            'blocks': blocks,
+            'mtime': mtime,
+            'inode': inode
+        })
+        child['diskSize'] = diskSize
+        children.append(child)
+
+    # Keep the same folder object so saveSnapshot() can tell it was reused.
+    snapshot['new'][node['path']] = folder
+
+    return children
+
+
+def readFolder(node, getDiskSize=None, withStat=False):
+    # Lists one folder with os.scandir and returns its selected entries as child nodes.
+    # Returns None if the folder cannot be read.
+    try:
+        with os.scandir(node['path']) as it:
+            entries = list(it)
+    except Exception as e:
+        LOG(f'[ACCESS ERROR] Cannot read {node["path"]} - {e}', True)
+        return None
+
+    children = []
 
     for entry in entries:
-        fullPath = os.path.join(path, entry)
+        try:
+            # Non-regular entries (sockets, broken links, ...) are skipped like before.
+            if not entry.is_dir() and not entry.is_file():
+                continue
+
+            record = readEntry(entry, withStat or getDiskSize is not None)
+
+            if isIgnored(record) or not isSelected(record):
+                continue
 
-        if isIgnored(entry, fullPath) or not isSelected(entry, fullPath):
+            child = createNode(record)
+
+            # Disk usage can fail per file too (e.g. cluster size lookups on network shares).
+            if not record['isDir'] and getDiskSize:
+                child['diskSize'] = getDiskSize(record)
+        except Exception as e:
+            LOG(f'[SIZE ERROR] {entry.path} - {e}', True)
             continue
 
-        if os.path.isfile(fullPath):
+        children.append(child)
+
+    return children
+
+
+def listFolder(node, getDiskSize=None, snapshot=None):
+    # Attaches one folder's selected entries as child nodes, reusing the snapshot listing when the folder is unchanged.
+    # getDiskSize is the disk usage backend, or None to skip collecting sizes.
+    # Returns the child folder nodes that still need to be listed. Stats are aggregated later by finalizeTree().
+    children = readFolderFromSnapshot(node, snapshot) if snapshot else None
+
+    if children is None:
+        # Modified times are needed to compare against the next snapshot, so entries are always stat'ed then.
+        children = readFolder(node, getDiskSize, snapshot is not None)
+
+        if children is None:
+            return []
+
+        if snapshot:
+            rows = [(c['name'], c['isDir'], c['actualSize'], c['blocks'], c['mtime'], c['inode'], c['diskSize']) for c in children]
+            snapshot['new'][node['path']] = (node['mtime'], rows)
+
+    node['children'].extend(children)
+    subFolders = [child for child in children if child['isDir']]
+
+    if DEBUG:
+        for subFolder in subFolders:
+            LOG(f'[VISITING] {subFolder["path"]}', True)
+
+    return subFolders
+
+
+def scanFolder(node, getDiskSize=None, snapshot=None):
+    # Sequential scan: lists the folder, then recurses into each subfolder.
+    for subFolder in listFolder(node, getDiskSize, snapshot):
+        scanFolder(subFolder, getDiskSize, snapshot)
+
+
+def scanFolderParallel(rootNode, getDiskSize=None, workers=4, snapshot=None):
+    # Parallel scan: a pool of workers pulls folders from one shared LIFO queue. Every listed folder pushes its
+    # subfolders back onto the queue, so any idle worker picks up (steals) whatever directory is pending next.
+    # LIFO keeps the traversal depth-first, which keeps the number of pending folders small.
+    # A worker never dies on an error: the first error is kept and raised once the queue is done, like scanFolder() would.
+    pending = queue.LifoQueue()
+    errors = []
+
+    def worker():
+        while True:
+            node = pending.get()
+
+            if node is None:
+                return
+
             try:
-                actualSize = os.path.getsize(fullPath)
-                diskSize = getClusterAwareDiskSize(fullPath, clusterSize)
-                fileCount += 1
-                byteSizeSum += actualSize
-                diskSizeSum += diskSize
+                # After an error the remaining folders are only drained, so join() returns quickly.
+                if not errors:
+                    for subFolder in listFolder(node, getDiskSize, snapshot):
+                        pending.put(subFolder)
             except Exception as e:
-                LOG(f'[SIZE ERROR] {fullPath} - {e}', True)
+                errors.append(e)
+            finally:
+                pending.task_done()
+
+    pending.put(rootNode)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(worker) for _ in range(workers)]
+        pending.join()
+
+        # Release the workers once every folder has been listed.
+        for _ in range(workers):
+            pending.put(None)
+
+        for future in futures:
+            future.result()
+
+    if errors:
+        raise errors[0]
+
+
+def createTopTracker(topN, collectSizes=True):
+    # Bounded min-heaps of (value, path). Each heap keeps at most topN items, so memory stays O(topN).
+    heaps = ['foldersByFileCount']
+
+    if collectSizes:
+        heaps = ['filesByDiskSize', 'filesByActualSize', 'foldersByDiskSize', 'foldersByActualSize'] + heaps
+
+    return { 'topN': topN, 'heaps': { name: [] for name in heaps } }
+
+
+def trackTop(topTracker, heapName, value, path):
+    heap = topTracker['heaps'].get(heapName)
+
+    if heap is None:
+        return
+
+    if len(heap) < topTracker['topN']:
+        heapq.heappush(heap, (value, path))
+    elif (value, path) > heap[0]:
+        heapq.heapreplace(heap, (value, path))
+
+
+def trackNode(topTracker, node):
+    # Called once per finished node, after its folder totals are known.
+    if node['isDir']:
+        trackTop(topTracker, 'foldersByDiskSize', node['diskSize'], node['path'])
+        trackTop(topTracker, 'foldersByActualSize', node['actualSize'], node['path'])
+        trackTop(topTracker, 'foldersByFileCount', node['fileCount'], node['path'])
+    else:
+        trackTop(topTracker, 'filesByDiskSize', node['diskSize'], node['path'])
+        trackTop(topTracker, 'filesByActualSize', node['actualSize'], node['path'])
+
+
+def finalizeTree(node, topTracker=None, seenInodes=None):
+    # Bottom-up pass that sorts each folder's children and aggregates file counts and sizes into the folder.
+    # Runs after the (sequential or parallel) listing, so the result is always the same.
+    # topTracker (from createTopTracker()) collects the largest files and folders along the way.
+    # seenInodes holds the packed inodes of hard-linked files already counted in 'uniqueDiskSize'.
+    if seenInodes is None:
+        seenInodes = set()
+
+    # Sort directories first, then files. Both keys are read from the records.
+    # Sorting first keeps the hard link that counts towards the unique size the same on every run.
+    node['children'].sort(key=lambda child: (not child['isDir'], child['name']))
+
+    for child in node['children']:
+        if child['isDir']:
+            finalizeTree(child, topTracker, seenInodes)
+            node['fileCount'] += child['fileCount']
+            node['folderCount'] += child['folderCount'] + 1
+        else:
+            node['fileCount'] += 1
+
+            if not child['inode']:
+                child['uniqueDiskSize'] = child['diskSize']
+            elif child['inode'] not in seenInodes:
+                seenInodes.add(child['inode'])
+                child['uniqueDiskSize'] = child['diskSize']
+
+        node['actualSize'] += child['actualSize']
+        node['diskSize'] += child['diskSize']
+        node['uniqueDiskSize'] += child['uniqueDiskSize']
+
+        if topTracker:
+            trackNode(topTracker, child)
+
+
+def scanTree(directory, collectSizes=True, workers=1, snapshot=None, topTracker=None):
+    # Single pass over the whole tree. Every output file is rendered from the returned root node.
+    # workers > 1 lists folders in parallel. The finished tree is identical either way.
+    # snapshot (from loadSnapshot()) reuses the listing of unchanged folders and collects this run's folders.
+    # topTracker (from createTopTracker()) collects the largest files and folders below the root.
+    st = os.stat(directory)
+    rootRecord = {
+        'name': os.path.basename(os.path.normpath(directory)),
+        'path': directory,
+        'isDir': True,
+        'actualSize': 0,
+        'blocks': 0,
+        'mtime': st.st_mtime_ns,
+        'inode': 0
+    }
+
+    rootNode = createNode(rootRecord)
+    getDiskSize = getDiskUsageBackend(DISK_USAGE_BACKEND) if collectSizes else None
+
+    if workers > 1:
+        scanFolderParallel(rootNode, getDiskSize, workers, snapshot)
+    else:
+        scanFolder(rootNode, getDiskSize, snapshot)
+
+    finalizeTree(rootNode, topTracker)
+
+    return rootNode
+
 
-        elif os.path.isdir(fullPath):
-            fc, bs, ds = getRecursiveFolderStats(fullPath)
-            fileCount += fc
-            byteSizeSum += bs
-            diskSizeSum += ds
+def timedScanTree(directory, collectSizes=True, workers=1, compareSpeed=False, snapshot=None, topTracker=None):
+    # Runs scanTree() and logs how long it took. With compareSpeed on a parallel run, first times a
+    # single-threaded scan of the same directory, then logs the speedup of the parallel one.
+    compareSpeed = compareSpeed and workers > 1
 
-    return fileCount, byteSizeSum, diskSizeSum
+    if compareSpeed:
+        startTime = time.perf_counter()
+        scanTree(directory, collectSizes, 1, snapshot)
+        sequentialElapsed = time.perf_counter() - startTime
+        LOG(f'[SCAN] Single-threaded scan took {sequentialElapsed:.2f}s.', True)
+
+    startTime = time.perf_counter()
+    rootNode = scanTree(directory, collectSizes, workers, snapshot, topTracker)
+    elapsed = time.perf_counter() - startTime
+
+    mode = f'{workers} workers' if workers > 1 else 'single-threaded'
+    LOG(f'[SCAN] Scanned {rootNode["fileCount"]:,} files in {elapsed:.2f}s ({mode}).', True)
+
+    if compareSpeed:
+        speedup = sequentialElapsed / elapsed if elapsed > 0 else 0
+        LOG(f'[SCAN] Speedup with {workers} workers: {speedup:.2f}x (parallel scan ran second, on a warm cache).', True)
+
+    return rootNode
 
 
 def writeRoot(f, showRootFolder=False):
@@ -306,213 +759,453 @@ def writeRoot(f, showRootFolder=False):
     return f'└── {rootName}\n'
 
 
-def walkTree(directory, ignoreList, scanFiles=False):
-    # Walks the full directory tree and collects:
-    #  - Visual lines (line, realPath, isDir)
-    #  - Folder stats (file count + size)
-    #  - File size map
-    #  - Alignment data
-
-    lines = []
-    fileSizeMap = {}
-    folderStatsMap = {}
-    allCounts = []
-    maxLineLength = 0
-    longestDiskStrLen = 0
-    longestDiskLabelLen = 0
-    longestActualLabelLen = 0
-
-    def recurse(dirPath, prefix='', depth=1): # Start depth at 1 (root level)
-        nonlocal maxLineLength, longestDiskStrLen, longestDiskLabelLen, longestActualLabelLen
-        # Filter items based on scanFiles flag.
-        try:
-            raw = sorted(os.listdir(dirPath))
-        except Exception as e:
-            LOG(f'[SKIPPED] {dirPath} - {e}', True)
-            return  # Skip this folder.
+def formatTruncatedSummary(node, scanFiles=False):
+    # Summary line for a folder whose contents are cut off by DEPTH_SEARCH. Uses the totals from the single scan.
+    if scanFiles:
+        itemCount = node['fileCount'] + node['folderCount']
 
-        if scanFiles:
-            filtered = [i for i in raw if isSelected(i, os.path.join(dirPath, i)) and not isIgnored(i, os.path.join(dirPath, i))]
-            filtered.sort(key=lambda item: (not os.path.isdir(os.path.join(dirPath, item)), item))
-            items = filtered
-        else:
-            items = [i for i in raw if isSelected(i, os.path.join(dirPath, i)) and not isIgnored(i, os.path.join(dirPath, i)) and os.path.isdir(os.path.join(dirPath, i))]
+        if itemCount == 0:
+            return None
 
-        # Iterate through items to construct the tree structure.
-        for index, item in enumerate(items):
-            # Define full path.
-            path = os.path.join(dirPath, item)
-            if os.path.isdir(path) and DEBUG:
-                LOG(f'[VISITING] {path}', True)
+        itemLabel = 'item' if itemCount == 1 else 'items'
+        folderLabel = 'folder' if node['folderCount'] == 1 else 'folders'
 
-            # Is folder flag.
-            isDirFlag = os.path.isdir(path)
+        return f'+ {itemCount:,} more {itemLabel} in {node["folderCount"]:,} {folderLabel}'
 
-            # Determine if this is the last item.
-            isLast = (index == len(items) - 1)
+    if node['folderCount'] == 0:
+        return None
 
-            # Set the connector for the item.
-            connector = '└── ' if isLast else '├── '
-            displaySlash = item + '/' if isDirFlag else item
+    return f'+ {node["folderCount"]:,} more folders' if node['folderCount'] != 1 else '+ 1 more folder'
 
-            # Find lengths.
-            line = f'{prefix}{connector}{displaySlash}'
-            maxLineLength = max(maxLineLength, len(line))
-
-            if os.path.isfile(path):
-                if scanFiles:
-                    try:
-                        # Record file size if enabled.
-                        clusterSize = getClusterSize(path)
-                        actualSize = os.path.getsize(path)
-                        diskSize = getClusterAwareDiskSize(path, clusterSize)
-
-                        diskLabel = formatFileSize(diskSize)
-                        actualLabel = formatFileSize(actualSize)
-
-                        longestDiskLabelLen = max(longestDiskLabelLen, len(diskLabel))
-                        longestActualLabelLen = max(longestActualLabelLen, len(actualLabel))
-
-                        fileSizeMap[path] = {
-                            'diskLabel': diskLabel,
-                            'actualLabel': actualLabel,
-                            'diskSize': diskSize,
-                            'actualSize': actualSize
-                        }
-
-                        diskStr = f'Disk: {diskLabel} ({diskSize:,} B)'
-                        longestDiskStrLen = max(longestDiskStrLen, len(diskStr))
-
-                        lines.append((line, path, False))
-                    except Exception as e:
-                        LOG(f'[SIZE ERROR] {path} - {e}', True)
-                continue  # Skip further logic for file.
-
-            # If directory (files skip this logic).
-            # Get folder's file count and size.
-            fileCount, actualBytes, diskBytes = getRecursiveFolderStats(path)
-            folderStatsMap[path] = (fileCount, actualBytes, diskBytes)
-            allCounts.append(f'{fileCount:,}')
-
-            diskLabel = formatFileSize(diskBytes)
-            actualLabel = formatFileSize(actualBytes)
-
-            longestDiskLabelLen = max(longestDiskLabelLen, len(diskLabel))
-            longestActualLabelLen = max(longestActualLabelLen, len(actualLabel))
-
-            folderDiskStr = f'Disk: {diskLabel} ({diskBytes:,} B)'
-            longestDiskStrLen = max(longestDiskStrLen, len(folderDiskStr))
-            lines.append((line, path, True))
-
-            if DEPTH_SEARCH == 0 or depth < DEPTH_SEARCH:
-                newPrefix = prefix + ('    ' if isLast else '│   ')
-                recurse(path, newPrefix, depth + 1)
 
-    recurse(directory)
-    return lines, fileSizeMap, folderStatsMap, allCounts, maxLineLength, longestDiskStrLen, longestDiskLabelLen, longestActualLabelLen
+def measureTree(rootNode, scanFiles=False):
+    # Cheap pre-pass that only computes the column widths needed for alignment. No lines are built or stored.
+    # Line length is derived from depth: every prefix segment and connector is 4 characters wide.
+    widths = {
+        'maxLineLength': 0,
+        'maxCountLen': 0,
+        'longestDiskStrLen': 0,
+        'longestDiskLabelLen': 0,
+        'longestUniqueStrLen': 0,
+        'longestUniqueLabelLen': 0,
+        'longestActualLabelLen': 0,
+        'hasFolders': False
+    }
+
+    def recurse(node, depth=1): # Start depth at 1 (root level)
+        for child in node['children']:
+            if not scanFiles and not child['isDir']:
+                continue
+
+            lineLength = 4 * depth + len(child['name']) + (1 if child['isDir'] else 0)
+            widths['maxLineLength'] = max(widths['maxLineLength'], lineLength)
+
+            if child['isDir']:
+                widths['hasFolders'] = True
+                widths['maxCountLen'] = max(widths['maxCountLen'], len(f'{child["fileCount"]:,}'))
+
+            diskLabel = formatFileSize(child['diskSize'])
+            actualLabel = formatFileSize(child['actualSize'])
+
+            widths['longestDiskLabelLen'] = max(widths['longestDiskLabelLen'], len(diskLabel))
+            widths['longestActualLabelLen'] = max(widths['longestActualLabelLen'], len(actualLabel))
+
+            diskStr = f'Disk: {diskLabel} ({child["diskSize"]:,} B)'
+            widths['longestDiskStrLen'] = max(widths['longestDiskStrLen'], len(diskStr))
 
+            if SHOW_UNIQUE_DISK_SIZE:
+                uniqueLabel = formatFileSize(child['uniqueDiskSize'])
+                widths['longestUniqueLabelLen'] = max(widths['longestUniqueLabelLen'], len(uniqueLabel))
 
-def generateTree(directory, ignoreList, scanFiles=False):
-    # Builds a fully formatted text representation of the tree, optionally with sizes.
+                uniqueStr = f'Unique: {uniqueLabel} ({child["uniqueDiskSize"]:,} B)'
+                widths['longestUniqueStrLen'] = max(widths['longestUniqueStrLen'], len(uniqueStr))
 
-    lines, fileSizeMap, folderStatsMap, allCounts, maxLen, longestDiskStrLen, longestDiskLabelLen, longestActualLabelLen = walkTree(directory, ignoreList, scanFiles)
+            if child['isDir'] and (DEPTH_SEARCH == 0 or depth < DEPTH_SEARCH):
+                recurse(child, depth + 1)
 
-    # Step 1: Determine maximum fileCount length (left-aligned).
-    maxCountLen = max((len(c) for c in allCounts), default=0)
+    recurse(rootNode)
+    return widths
 
-    # Step 2: Longest possible label.
+
+def generateTree(rootNode, scanFiles=False):
+    # Yields the formatted tree line by line, with sizes, aligned using the widths from measureTree().
+    widths = measureTree(rootNode, scanFiles)
+    maxLen = widths['maxLineLength']
+    maxCountLen = widths['maxCountLen']
+    longestDiskLabelLen = widths['longestDiskLabelLen']
+    longestUniqueLabelLen = widths['longestUniqueLabelLen']
+    longestActualLabelLen = widths['longestActualLabelLen']
+
+    # Longest possible label.
     labelLen = len('Files, ')
 
-    # Step 3: Compute the total left-padding needed for file sizes.
-    sizeAlignCol = (maxCountLen + 1 + labelLen + 1) if allCounts else 0
+    # Compute the total left-padding needed for file sizes.
+    sizeAlignCol = (maxCountLen + 1 + labelLen + 1) if widths['hasFolders'] else 0
+    emptyPrefix = ' ' * sizeAlignCol
 
-    # Step 4: Space between 'Disk:' and 'Actual:' strings.
-    diskActualAlignCol = longestDiskStrLen + 2
+    # Space between 'Disk:' and 'Actual:' strings (and 'Unique:' between them, if shown).
+    diskActualAlignCol = widths['longestDiskStrLen'] + 2
+    uniqueAlignCol = widths['longestUniqueStrLen'] + 2
 
-    # Initialize tree variable.
-    treeStructure = ''
+    def recurse(node, prefix='', depth=1): # Start depth at 1 (root level)
+        # Filter items based on scanFiles flag.
+        items = node['children'] if scanFiles else [child for child in node['children'] if child['isDir']]
 
-    for line, realPath, isDir in lines:
-        prefixPadding = ' ' * (maxLen - len(line))  # Align '-' symbols visually.
+        # Iterate through items to construct the tree structure.
+        for index, child in enumerate(items):
+            # Determine if this is the last item.
+            isLast = (index == len(items) - 1)
 
-        if isDir and realPath in folderStatsMap:
-            fileCount, actualBytes, diskBytes = folderStatsMap[realPath]
-            countStr = f'{fileCount:,}'.ljust(maxCountLen)
-            label = 'File,  ' if fileCount == 1 else 'Files, '
+            # Set the connector for the item.
+            connector = '└── ' if isLast else '├── '
+            displaySlash = child['name'] + '/' if child['isDir'] else child['name']
 
-            diskLabel = formatFileSize(diskBytes).ljust(longestDiskLabelLen)
-            actualLabel = formatFileSize(actualBytes).ljust(longestActualLabelLen)
+            line = f'{prefix}{connector}{displaySlash}'
+            prefixPadding = ' ' * (maxLen - len(line))  # Align '-' symbols visually.
 
-            diskStrFormatted = f'Disk: {diskLabel} ({diskBytes:,} B)'
-            actualStrFormatted = f'Actual: {actualLabel} ({actualBytes:,} B)'
+            diskLabel = formatFileSize(child['diskSize']).ljust(longestDiskLabelLen)
+            actualLabel = formatFileSize(child['actualSize']).ljust(longestActualLabelLen)
+
+            diskStrFormatted = f'Disk: {diskLabel} ({child["diskSize"]:,} B)'
+            actualStrFormatted = f'Actual: {actualLabel} ({child["actualSize"]:,} B)'
 
             padding = ' ' * (diskActualAlignCol - len(diskStrFormatted))
-            treeStructure += (
-                f'{line}{prefixPadding}  -  {countStr} {label} {diskStrFormatted}{padding}{actualStrFormatted}\n'
-            )
-        elif not isDir and realPath in fileSizeMap:
-            info = fileSizeMap[realPath]
 
-            diskLabel = info['diskLabel'].ljust(longestDiskLabelLen)
-            actualLabel = info['actualLabel'].ljust(longestActualLabelLen)
+            if SHOW_UNIQUE_DISK_SIZE:
+                uniqueLabel = formatFileSize(child['uniqueDiskSize']).ljust(longestUniqueLabelLen)
+                uniqueStrFormatted = f'Unique: {uniqueLabel} ({child["uniqueDiskSize"]:,} B)'
+                padding += uniqueStrFormatted + ' ' * (uniqueAlignCol - len(uniqueStrFormatted))
 
-            diskStrFormatted = f'Disk: {diskLabel} ({info["diskSize"]:,} B)'
-            actualStrFormatted = f'Actual: {actualLabel} ({info["actualSize"]:,} B)'
+            if child['isDir']:
+                fileCount = child['fileCount']
+                countStr = f'{fileCount:,}'.ljust(maxCountLen)
+                label = 'File,  ' if fileCount == 1 else 'Files, '
 
-            padding = ' ' * (diskActualAlignCol - len(diskStrFormatted))
-            emptyPrefix = ' ' * sizeAlignCol if allCounts else ''
-            treeStructure += f'{line}{prefixPadding}  -  {emptyPrefix}{diskStrFormatted}{padding}{actualStrFormatted}\n'
+                yield f'{line}{prefixPadding}  -  {countStr} {label} {diskStrFormatted}{padding}{actualStrFormatted}'
 
-    return treeStructure
+                newPrefix = prefix + ('    ' if isLast else '│   ')
 
+                if DEPTH_SEARCH == 0 or depth < DEPTH_SEARCH:
+                    yield from recurse(child, newPrefix, depth + 1)
+                else:
+                    summary = formatTruncatedSummary(child, scanFiles)
 
-def buildSimpleTree(path, ignoreList, includeFiles, prefix='', depth=1):
-    # Sort directories first, then files. Ignore folders/files in ignoreList.
+                    if summary:
+                        yield f'{newPrefix}└── {summary}'
+            else:
+                yield f'{line}{prefixPadding}  -  {emptyPrefix}{diskStrFormatted}{padding}{actualStrFormatted}'
 
-    try:
-        entries = os.listdir(path)
-    except Exception as e:
-        LOG(f'[SKIPPED] {path} - {e}', True)
-        return  # Skip this folder completely.
-
-    items = sorted(
-        [
-            i for i in entries
-            if isSelected(i, os.path.join(path, i))
-            and not isIgnored(i, os.path.join(path, i))
-            and (includeFiles or os.path.isdir(os.path.join(path, i)))
-        ],
-        key=lambda item: (not os.path.isdir(os.path.join(path, item)), item)
-    )
+    yield from recurse(rootNode)
 
-    # Iterate through items to construct the tree structure.
-    for index, item in enumerate(items):
-        # Define full path.
-        subPath = os.path.join(path, item)
-        if os.path.isdir(subPath) and DEBUG:
-            LOG(f'[VISITING] {subPath}', True)
 
-        # Is folder flag.
-        isDirFlag = os.path.isdir(subPath)
+def buildSimpleTree(node, includeFiles, prefix='', depth=1):
+    # Children are already sorted directories first, then files.
+    items = [child for child in node['children'] if includeFiles or child['isDir']]
 
+    # Iterate through items to construct the tree structure.
+    for index, child in enumerate(items):
         # Determine if this is the last item.
         isLast = index == len(items) - 1
 
         # Set the connector for the item.
         connector = '└── ' if isLast else '├── '
-        displaySlash = item + '/' if isDirFlag else item
+        displaySlash = child['name'] + '/' if child['isDir'] else child['name']
 
         yield f'{prefix}{connector}{displaySlash}'
 
-        if isDirFlag and (DEPTH_SEARCH == 0 or depth < DEPTH_SEARCH):
-            newPrefix = prefix + ('    ' if isLast else '│   ')
-            yield from buildSimpleTree(subPath, ignoreList, includeFiles, newPrefix, depth + 1)
+        if not child['isDir']:
+            continue
+
+        newPrefix = prefix + ('    ' if isLast else '│   ')
+
+        if DEPTH_SEARCH == 0 or depth < DEPTH_SEARCH:
+            yield from buildSimpleTree(child, includeFiles, newPrefix, depth + 1)
+        else:
+            summary = formatTruncatedSummary(child, includeFiles)
+
+            if summary:
+                yield f'{newPrefix}└── {summary}'
+
+
+def writeTreeFile(filePath, directory, lines, showRootFolder=False):
+    # Streams rendered lines straight into a buffered file writer. Nothing is joined in memory.
+    # Set indentation based on showRootFolder toggle.
+    indent = '    ' if showRootFolder else ''
+
+    with open(filePath, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as f:
+        if showRootFolder:
+            f.write(writeRoot(directory, showRootFolder))
+
+        for line in lines:
+            f.write(f'{indent}{line}\n')
+
+
+def iterTreeNodes(rootNode):
+    # Yields (id, parentId, node) for every node in pre-order. The root is id 0 with parentId -1.
+    nextId = 0
+
+    def recurse(node, parentId):
+        nonlocal nextId
+        nodeId = nextId
+        nextId += 1
+
+        yield nodeId, parentId, node
+
+        for child in node['children']:
+            yield from recurse(child, nodeId)
+
+    yield from recurse(rootNode, -1)
+
+
+def exportTreeNdjson(filePath, rootNode):
+    # Streams one JSON object per node into a buffered writer.
+    with open(filePath, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as f:
+        for nodeId, parentId, node in iterTreeNodes(rootNode):
+            row = {
+                'id': nodeId,
+                'parentId': parentId,
+                'name': node['name'],
+                'path': node['path'],
+                'isDir': node['isDir'],
+                'fileCount': node['fileCount'],
+                'actualSize': node['actualSize'],
+                'diskSize': node['diskSize']
+            }
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+
+# Binary export layout (all integers little-endian):
+#   Header:  8-byte magic, uint64 node count N.
+#   Columns: parentId int64[N], isDir uint8[N], fileCount int64[N], actualSize int64[N], diskSize int64[N],
+#            nameOffsets int64[N + 1], then the UTF-8 names blob. Node ids are row indexes (pre-order, root = 0).
+BINARY_TREE_MAGIC = b'PTREE\x00\x01\x00'
+BINARY_TREE_COLUMNS = [('parentId', 'q'), ('isDir', 'B'), ('fileCount', 'q'), ('actualSize', 'q'), ('diskSize', 'q'), ('nameOffsets', 'q')]
+
+
+def exportTreeBinary(filePath, rootNode):
+    columns = { name: array.array(typeCode) for name, typeCode in BINARY_TREE_COLUMNS }
+    names = bytearray()
+    columns['nameOffsets'].append(0)
+
+    for nodeId, parentId, node in iterTreeNodes(rootNode):
+        columns['parentId'].append(parentId)
+        columns['isDir'].append(1 if node['isDir'] else 0)
+        columns['fileCount'].append(node['fileCount'])
+        columns['actualSize'].append(node['actualSize'])
+        columns['diskSize'].append(node['diskSize'])
+
+        names += node['name'].encode('utf-8', errors='surrogateescape')
+        columns['nameOffsets'].append(len(names))
+
+    with open(filePath, 'wb') as f:
+        f.write(struct.pack('<8sQ', BINARY_TREE_MAGIC, len(columns['parentId'])))
+
+        for name, typeCode in BINARY_TREE_COLUMNS:
+            column = columns[name]
+
+            if sys.byteorder != 'little':
+                column.byteswap()
+
+            column.tofile(f)
+
+        f.write(names)
+
+
+def loadBinaryTree(filePath):
+    # Reads a file written by exportTreeBinary(). Returns a dict of column arrays plus the raw 'namesBlob'.
+    # Names are not decoded here. Use getBinaryTreeName() to decode the ones you need.
+    with open(filePath, 'rb') as f:
+        magic, nodeCount = struct.unpack('<8sQ', f.read(16))
+
+        if magic != BINARY_TREE_MAGIC:
+            raise ValueError(f'Not a binary tree export: {filePath}')
+
+        columns = {}
+
+        for name, typeCode in BINARY_TREE_COLUMNS:
+            column = array.array(typeCode)
+            column.fromfile(f, nodeCount + 1 if name == 'nameOffsets' else nodeCount)
+
+            if sys.byteorder != 'little':
+                column.byteswap()
+
+            columns[name] = column
+
+        columns['namesBlob'] = f.read()
+
+    return columns
+
+
+def getBinaryTreeName(tree, nodeId):
+    # Decodes the name of one node of a tree returned by loadBinaryTree().
+    offsets = tree['nameOffsets']
+
+    return tree['namesBlob'][offsets[nodeId]:offsets[nodeId + 1]].decode('utf-8', errors='surrogateescape')
+
+
+def writeTopReport(filePath, topTracker):
+    # Short summary of where the space went, largest first.
+    sections = [
+        ('filesByDiskSize', 'Largest files by disk size'),
+        ('filesByActualSize', 'Largest files by actual size'),
+        ('foldersByDiskSize', 'Largest folders by disk size'),
+        ('foldersByActualSize', 'Largest folders by actual size'),
+        ('foldersByFileCount', 'Folders with the most files')
+    ]
+
+    with open(filePath, 'w', encoding='utf-8') as f:
+        for heapName, title in sections:
+            if heapName not in topTracker['heaps']:
+                continue
+
+            items = sorted(topTracker['heaps'][heapName], key=lambda item: (-item[0], item[1]))
+            f.write(f'{title} (top {topTracker["topN"]}):\n')
+
+            if not items:
+                f.write('    (none)\n')
+
+            for rank, (value, path) in enumerate(items, 1):
+                if heapName == 'foldersByFileCount':
+                    valueStr = f'{value:,} File' if value == 1 else f'{value:,} Files'
+                else:
+                    valueStr = f'{formatFileSize(value)} ({value:,} B)'
+
+                f.write(f'    {rank:>{len(str(len(items)))}}. {valueStr}  -  {path}\n')
+
+            f.write('\n')
+
+
+EXPORT_ROW_FIELDS = ('id', 'parentId', 'name', 'isDir', 'fileCount', 'actualSize', 'diskSize')
+
+
+def parseExportRow(filePath, lineNo, line):
+    # One row of an NDJSON export. Anything else (e.g. the USE_SNAPSHOT pickle) raises a ValueError naming the file.
+    try:
+        row = json.loads(line)
+    except ValueError:
+        row = None
+
+    if not isinstance(row, dict) or any(field not in row for field in EXPORT_ROW_FIELDS):
+        raise ValueError(f'Not an NDJSON tree export (see EXPORT_NDJSON), line {lineNo}: {filePath}')
+
+    return row
+
+
+def iterExportNodes(filePath):
+    # Streams the nodes of an NDJSON export as (key, row). The key is the path below the root as a tuple of
+    # (not isDir, name) steps, which is exactly the order the export was written in (pre-order, folders first, then by name).
+    # Only the keys of the current folder chain are kept in memory.
+    stack = []
+
+    lineNo = 0
+
+    with open(filePath, 'r', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as f:
+        try:
+            for lineNo, line in enumerate(f, 1):
+                row = parseExportRow(filePath, lineNo, line)
+
+                while stack and stack[-1][0] != row['parentId']:
+                    stack.pop()
+
+                if row['parentId'] == -1:
+                    key = ()
+                else:
+                    key = stack[-1][1] + ((not row['isDir'], row['name']),)
+
+                if row['isDir']:
+                    stack.append((row['id'], key))
+
+                yield key, row
+        except UnicodeDecodeError:
+            raise ValueError(f'Not an NDJSON tree export (see EXPORT_NDJSON), line {lineNo + 1}: {filePath}') from None
+
+
+def formatSizeDelta(delta):
+    sign = '+' if delta >= 0 else '-'
+
+    return f'{sign}{formatFileSize(abs(delta))} ({sign}{abs(delta):,} B)'
+
+
+def formatDiffLine(mark, key, oldRow, newRow):
+    # One report line. Removed/added rows count as all zeros on the missing side.
+    relPath = '/'.join(name for isFile, name in key) + ('/' if not key[-1][0] else '')
+    oldRow = oldRow or { 'fileCount': 0, 'diskSize': 0, 'actualSize': 0 }
+    newRow = newRow or { 'fileCount': 0, 'diskSize': 0, 'actualSize': 0 }
+
+    diskDelta = newRow['diskSize'] - oldRow['diskSize']
+    actualDelta = newRow['actualSize'] - oldRow['actualSize']
+    line = f'{mark} {relPath}  -  Disk: {formatSizeDelta(diskDelta)}  Actual: {formatSizeDelta(actualDelta)}'
+
+    if not key[-1][0]:
+        line += f'  Files: {newRow["fileCount"] - oldRow["fileCount"]:+,}'
+
+    return line
+
+
+def diffTreeExports(oldPath, newPath, outputPath):
+    # Linear merge of two sorted node streams. Added and removed folders are reported once, with their whole
+    # subtree skipped. Folder rows already hold recursive totals, so their deltas are the rolled-up deltas.
+    oldNodes = iterExportNodes(oldPath)
+    newNodes = iterExportNodes(newPath)
+    old = next(oldNodes, None)
+    new = next(newNodes, None)
+
+    # The roots are taken off both streams before the merge and only summarized. An empty export has no root,
+    # so its totals count as zeros and every top-level entry of the other export is listed as added/removed.
+    counts = { 'added': 0, 'removed': 0, 'changed': 0 }
+    emptyRow = { 'fileCount': 0, 'diskSize': 0, 'actualSize': 0 }
+    oldRoot, newRoot = emptyRow, emptyRow
+
+    if old and old[0] == ():
+        oldRoot, old = old[1], next(oldNodes, None)
+    if new and new[0] == ():
+        newRoot, new = new[1], next(newNodes, None)
+
+    def skipSubtree(nodes, key):
+        # Returns the first node after the subtree of key.
+        for node in nodes:
+            if node[0][:len(key)] != key:
+                return node
+
+        return None
+
+    with open(outputPath, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as f:
+        f.write(f'Old: {oldPath}\nNew: {newPath}\n\n')
+
+        while old or new:
+            if new is None or (old and old[0] < new[0]):
+                counts['removed'] += 1
+                f.write(formatDiffLine('[-]', old[0], old[1], None) + '\n')
+                old = skipSubtree(oldNodes, old[0]) if old[1]['isDir'] else next(oldNodes, None)
+            elif old is None or new[0] < old[0]:
+                counts['added'] += 1
+                f.write(formatDiffLine('[+]', new[0], None, new[1]) + '\n')
+                new = skipSubtree(newNodes, new[0]) if new[1]['isDir'] else next(newNodes, None)
+            else:
+                oldRow, newRow = old[1], new[1]
+                changed = any(oldRow[field] != newRow[field] for field in ('fileCount', 'diskSize', 'actualSize'))
+
+                if changed:
+                    counts['changed'] += 1
+                    f.write(formatDiffLine('[~]', old[0], oldRow, newRow) + '\n')
+
+                old = next(oldNodes, None)
+                new = next(newNodes, None)
+
+        f.write(f'\n{counts["added"]:,} added, {counts["removed"]:,} removed, {counts["changed"]:,} changed.\n')
+
+        f.write(f'Total  -  Disk: {formatSizeDelta(newRoot["diskSize"] - oldRoot["diskSize"])}  '
+                f'Actual: {formatSizeDelta(newRoot["actualSize"] - oldRoot["actualSize"])}  '
+                f'Files: {newRoot["fileCount"] - oldRoot["fileCount"]:+,}\n')
+
+    return counts
 
 
 def saveTreeToFile(directory, outputFolder, outputFile, ignoreList, showFileSize=False, scanFiles=False, showRootFolder=False):
     # Saves both output files:
     # 1. Folders only.
     # 2. Folders + Files (if scanFiles=True).
+    # Both are rendered from a single scan of the directory.
 
     # Ensure output folder exists.
     if outputFolder:
@@ -524,46 +1217,141 @@ def saveTreeToFile(directory, outputFolder, outputFile, ignoreList, showFileSize
     # Base path for the main output file (folders only).
     basePath = os.path.join(outputFolderPath, outputFile)
 
-    # Set indentation based on showRootFolder toggle.
-    indent = '    ' if showRootFolder else ''
+    # Load the last run's snapshot so unchanged folders are not listed again.
+    snapshotPath = os.path.join(outputFolderPath, SNAPSHOT_NAME)
+    snapshot = loadSnapshot(snapshotPath, showFileSize) if USE_SNAPSHOT else None
 
-    # Write outputFile.txt always.
-    with open(basePath, 'w', encoding='utf-8') as f:
-        if showRootFolder:
-            f.write(writeRoot(directory, showRootFolder))
+    # Largest files/folders are collected during the scan when TOP_N is set.
+    topTracker = createTopTracker(TOP_N, showFileSize) if TOP_N > 0 else None
 
-        # If showFileSize is True, create tree structures.
-        if showFileSize:
-            tree = generateTree(directory, ignoreList, scanFiles=False)
+    # Scan the directory once. File sizes are only collected when they will be shown.
+    rootNode = timedScanTree(directory, showFileSize, SCAN_WORKERS, COMPARE_SCAN_SPEED, snapshot, topTracker)
 
-            for line in tree.splitlines():
-                f.write(indent + line + '\n')
-        else:
-            for line in buildSimpleTree(directory, ignoreList, includeFiles=False):
-                f.write(indent + line + '\n')
+    if snapshot:
+        saveSnapshot(snapshotPath, showFileSize, snapshot)
 
+    # Write outputFile.txt always.
+    if showFileSize:
+        lines = generateTree(rootNode, scanFiles=False)
+    else:
+        lines = buildSimpleTree(rootNode, includeFiles=False)
+
+    writeTreeFile(basePath, directory, lines, showRootFolder)
     LOG(f'Saved tree:\n\t{basePath}', True)
 
-    # If scanFiles is True, also generate & save a second tree structure that includes files.
+    # If scanFiles is True, also save a second tree structure that includes files.
     if scanFiles:
         name, ext = os.path.splitext(outputFile)
         withFilesPath = os.path.join(outputFolderPath, f'{name}AndFiles{ext}')
 
-        with open(withFilesPath, 'w', encoding='utf-8') as f:
-            if showRootFolder:
-                f.write(writeRoot(directory, showRootFolder))
+        if showFileSize:
+            lines = generateTree(rootNode, scanFiles=True)
+        else:
+            lines = buildSimpleTree(rootNode, includeFiles=True)
+
+        writeTreeFile(withFilesPath, directory, lines, showRootFolder)
+        LOG(f'Saved (with files):\n\t{withFilesPath}', True)
+
+    name, ext = os.path.splitext(outputFile)
+
+    if topTracker:
+        topReportPath = os.path.join(outputFolderPath, f'{name}Largest{ext}')
+        writeTopReport(topReportPath, topTracker)
+        LOG(f'Saved (largest):\n\t{topReportPath}', True)
+
+    # Machine readable exports of the same scanned tree.
+    if EXPORT_NDJSON:
+        ndjsonPath = os.path.join(outputFolderPath, f'{name}.ndjson')
+        exportTreeNdjson(ndjsonPath, rootNode)
+        LOG(f'Saved (NDJSON):\n\t{ndjsonPath}', True)
+
+    if EXPORT_BINARY:
+        binaryPath = os.path.join(outputFolderPath, f'{name}.bin')
+        exportTreeBinary(binaryPath, rootNode)
+        LOG(f'Saved (binary):\n\t{binaryPath}', True)
+
+    return rootNode
+
+
+def getBatchFolderName(index, directory):
+    # Output subfolder for one batch root, e.g. 'C:\Data\Photos' -> '01_C_Data_Photos'.
+    safeName = re.sub(r'[^\w.-]+', '_', os.path.normpath(directory)).strip('_') or 'root'
+
+    return f'{index + 1:02d}_{safeName}'
+
+
+def saveBatchTrees(directories, outputFolder, outputFile, ignoreList, showFileSize=False, scanFiles=False, showRootFolder=False):
+    # Scans every root with saveTreeToFile() into its own output subfolder, all in one process.
+    # Roots are grouped by device. Each device gets one worker, which scans its roots one after another.
+    outputFolderPath = os.path.abspath(outputFolder) if outputFolder else os.path.dirname(os.path.abspath(__file__))
+    os.makedirs(outputFolderPath, exist_ok=True)
+
+    results = [None] * len(directories)
+    deviceGroups = {}
+
+    for index, directory in enumerate(directories):
+        try:
+            device = os.stat(directory).st_dev
+        except OSError as e:
+            LOG(f'[ACCESS ERROR] Cannot read {directory} - {e}', True)
+            results[index] = { 'directory': directory, 'error': str(e) }
+            continue
+
+        deviceGroups.setdefault(device, []).append(index)
+
+    def scanDevice(indexes):
+        for index in indexes:
+            directory = directories[index]
+            rootFolderPath = os.path.join(outputFolderPath, getBatchFolderName(index, directory))
+            startTime = time.perf_counter()
+
+            try:
+                rootNode = saveTreeToFile(directory, rootFolderPath, outputFile, ignoreList, showFileSize, scanFiles, showRootFolder)
+                results[index] = { 'directory': directory, 'outputFolder': rootFolderPath, 'node': rootNode, 'elapsed': time.perf_counter() - startTime }
+            except Exception as e:
+                LOG(f'[ERROR] Batch scan failed for {directory} - {e}', True)
+                results[index] = { 'directory': directory, 'error': str(e) }
+
+    LOG(f'[BATCH] Scanning {len(directories):,} roots on {len(deviceGroups):,} devices.', True)
+
+    if deviceGroups:
+        with ThreadPoolExecutor(max_workers=len(deviceGroups)) as pool:
+            for future in [pool.submit(scanDevice, indexes) for indexes in deviceGroups.values()]:
+                future.result()
+
+    name, ext = os.path.splitext(outputFile)
+    indexPath = os.path.join(outputFolderPath, f'{name}Index{ext}')
+    writeBatchIndex(indexPath, results, showFileSize)
+    LOG(f'Saved batch index:\n\t{indexPath}', True)
+
+
+def writeBatchIndex(filePath, results, showFileSize=False):
+    # One line per root, in the order given in BATCH_PATHS, plus a combined total.
+    totals = { 'fileCount': 0, 'folderCount': 0, 'diskSize': 0, 'actualSize': 0 }
+
+    with open(filePath, 'w', encoding='utf-8') as f:
+        for result in results:
+            if 'error' in result:
+                f.write(f'[ERROR] {result["directory"]}  -  {result["error"]}\n')
+                continue
+
+            node = result['node']
+            line = f'{result["directory"]}  -  {node["fileCount"]:,} Files, {node["folderCount"]:,} Folders'
 
-            # If showFileSize is True, create tree structures.
             if showFileSize:
-                tree = generateTree(directory, ignoreList, scanFiles=True)
+                line += f', Disk: {formatFileSize(node["diskSize"])} ({node["diskSize"]:,} B), Actual: {formatFileSize(node["actualSize"])} ({node["actualSize"]:,} B)'
 
-                for line in tree.splitlines():
-                    f.write(indent + line + '\n')
-            else:
-                for line in buildSimpleTree(directory, ignoreList, includeFiles=True):
-                    f.write(indent + line + '\n')
+            f.write(f'{line}  -  {result["elapsed"]:.2f}s\n    {result["outputFolder"]}\n')
 
-        LOG(f'Saved (with files):\n\t{withFilesPath}', True)
+            for key in totals:
+                totals[key] += node[key]
+
+        line = f'\nTotal  -  {totals["fileCount"]:,} Files, {totals["folderCount"]:,} Folders'
+
+        if showFileSize:
+            line += f', Disk: {formatFileSize(totals["diskSize"])} ({totals["diskSize"]:,} B), Actual: {formatFileSize(totals["actualSize"])} ({totals["actualSize"]:,} B)'
+
+        f.write(line + '\n')
 
 
 if __name__ == '__main__':
@@ -574,7 +1362,20 @@ if __name__ == '__main__':
     try:
         LOG(f'[START] Script started at {datetime.now().strftime("%m/%d/%y %I:%M:%S %p")}.\n', True)
 
-        saveTreeToFile(SELECT_PATH, OUTPUT_PATH, OUTPUT_NAME, IGNORE_LIST, SHOW_FILE_SIZE, SCAN_FILES, SHOW_ROOT_FOLDER)
+        if DIFF_OLD_EXPORT and DIFF_NEW_EXPORT:
+            outputFolderPath = os.path.abspath(OUTPUT_PATH) if OUTPUT_PATH else os.path.dirname(os.path.abspath(__file__))
+            os.makedirs(outputFolderPath, exist_ok=True)
+
+            name, ext = os.path.splitext(OUTPUT_NAME)
+            diffPath = os.path.join(outputFolderPath, f'{name}Diff{ext}')
+            counts = diffTreeExports(DIFF_OLD_EXPORT, DIFF_NEW_EXPORT, diffPath)
+
+            LOG(f'[DIFF] {counts["added"]:,} added, {counts["removed"]:,} removed, {counts["changed"]:,} changed.', True)
+            LOG(f'Saved diff:\n\t{diffPath}', True)
+        elif BATCH_PATHS:
+            saveBatchTrees(BATCH_PATHS, OUTPUT_PATH, OUTPUT_NAME, IGNORE_LIST, SHOW_FILE_SIZE, SCAN_FILES, SHOW_ROOT_FOLDER)
+        else:
+            saveTreeToFile(SELECT_PATH, OUTPUT_PATH, OUTPUT_NAME, IGNORE_LIST, SHOW_FILE_SIZE, SCAN_FILES, SHOW_ROOT_FOLDER)
 
         if USE_LOG_FILE:
             LOG(f'\nLogs saved to "{logFile.replace("\\", "/")}"', True)
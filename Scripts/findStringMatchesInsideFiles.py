@@ -1,11 +1,21 @@
 # Run by:  python findStringMatchesInsideFiles.py
-# Searches through text-based files with specific extensions for one or more exact substring matches.
-# Operates line-by-line (no regex or multiline support) and logs any matches with line numbers and context.
+# Searches through text-based files with specific extensions for one or more exact substring (or regex) matches.
+# Operates line-by-line by default and logs any matches with line numbers and context. See the query modes in CONFIG.
 # Ideal for quickly locating hardcoded values, IDs, or phrases across config and data files.
 
 # Imports
+import codecs
+import csv
+import json
+import mmap
 import os
+import pickle
+import re
+import time
 import traceback
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 
@@ -26,9 +36,71 @@ VALID_EXTENSIONS = ['.json', '.ini', '.csv', '.xml']
 
 
 #@ Set the specific substrings to find inside each file.
-# NOTE: No regex, no multi-line scanning. Each line is compared as-is (whitespace sensitive).
+# NOTE: By default (SEARCH_MODE = 'exact', all query flags off) each line is compared as-is (case and whitespace sensitive).
 SUBSTRINGS = ['string 1', 'string 2', 'string 3']
 
+#@ Query modes. All SUBSTRINGS are compiled once into one combined pattern that runs on the raw file bytes.
+# SEARCH_MODE: 'exact' (plain substrings) or 'regex' (each entry is a Python regular expression, ^ and $ match at line breaks).
+#              Each regex entry is compiled on its own, so groups, backreferences and leading inline flags like (?i) work.
+#              Entries that use them are searched one by one instead of through the combined pattern.
+# Line breaks in queries match both LF and CRLF files: '\n' in exact strings, and '\n' and '$' in regex (outside [...]).
+# IGNORE_CASE: Case-insensitive matching. Non-ASCII letters in exact strings match both cases ('été' finds 'ÉTÉ').
+#              NOTE: In regex mode only ASCII letters are case folded, since matching runs on UTF-8 bytes. Use [éÉ] there.
+# WHOLE_WORD: Only match whole words (word boundaries on both sides of each entry). Boundaries are Unicode-aware like
+#             a str regex's \b, so 'caf' doesn't match inside 'café'.
+# MULTILINE: Let a match span line breaks. Use '\n' in exact strings, or '\n'/'\s' in regex ('.' only crosses lines with (?s)).
+#            NOTE: Files read in chunks only keep CONTEXT_LINES lines past each chunk, so longer matches can be missed there.
+SEARCH_MODE = 'exact'
+IGNORE_CASE = False
+WHOLE_WORD = False
+MULTILINE = False
+
+# Count-only mode for inventory sweeps: no context or per-match output, only how often each SUBSTRINGS entry occurs in
+# each file (a hit is a line containing the entry, like in the normal output). The pattern x file counts are logged at the end.
+# COUNT_STOP_AFTER: Stop searching a file once it has this many hits (its counts are then lower bounds). None = count everything.
+#                   NOTE: Each range of a split file (see SPLIT_SIZE) stops on its own, so those files can report more.
+COUNT_ONLY = False
+COUNT_STOP_AFTER = None
+
+# Number of lines shown before and after each matching line.
+CONTEXT_LINES = 4
+
+# Match output is collected per file and written to the log in one go (at most MATCH_BATCH_SIZE matches per write).
+# Only the first CONSOLE_MAX_MATCHES matches are printed to the console. After that each file prints a one-line summary
+# and the full output is only in the log file. Set to None to print every match.
+MATCH_BATCH_SIZE = 1000
+CONSOLE_MAX_MATCHES = 100
+
+# Files are read and matched in binary chunks of this size (bytes). Only lines around a hit are decoded.
+CHUNK_SIZE = 8 * 1024 * 1024
+
+# Files at or above this size (bytes) are memory-mapped and searched in place instead of read in chunks.
+# Memory use stays small no matter how big the file is. Set to 0 to always use chunked reads.
+MMAP_THRESHOLD = 256 * 1024 * 1024
+
+# Number of worker processes searching files in parallel. 1 = search one file at a time in this process.
+# Results are merged back in path/line order, so the log is the same as a sequential run.
+SEARCH_WORKERS = 1
+# With SEARCH_WORKERS > 1, files larger than this (bytes) are split into ranges of about this size, cut at line boundaries.
+SPLIT_SIZE = 64 * 1024 * 1024
+
+# The first SNIFF_SIZE bytes of each file are checked for a BOM and NUL bytes to pick its encoding.
+# UTF-8 (and plain ASCII) files are searched directly. UTF-16/UTF-32 files are first checked for hits with targets
+# encoded the same way, and only decoded if something may match (regex mode always decodes them).
+# Files that look binary (NUL bytes that aren't UTF-16 text) are skipped if SKIP_BINARY_FILES is True.
+SNIFF_SIZE = 8192
+SKIP_BINARY_FILES = True
+
+# Persistent trigram index for repeated searches over the same trees. For every 3-byte sequence the index keeps the ids
+# of the files containing it, and only files that could contain a target are searched. Files are re-indexed when their
+# modified time or size changes. Regex queries and targets shorter than 3 bytes don't use (or update) the index.
+# INDEX_PATH: Folder to save the index (absolute or relative, like LOG_PATH). Set to None or '' to use the script's folder.
+# INDEX_MAX_FILE_SIZE: Larger files are not indexed and are always searched.
+USE_SEARCH_INDEX = False
+INDEX_PATH = 'Index'
+INDEX_NAME = 'findStringMatchesIndex.pickle'
+INDEX_MAX_FILE_SIZE = 64 * 1024 * 1024
+
 
 # Set the log file config.
 # LOG_PATH: Folder to save logs. Supports both absolute and relative paths — e.g. 'Logs', './Logs', '../Logs', or 'D:/Logs/'.
@@ -38,12 +110,34 @@ USE_LOG_FILE = True  #! Enable or disable log file saving entirely.
 LOG_PATH = 'Logs'
 LOG_NAME = 'findStringMatchesInsideFiles.txt'
 
-# Clear the console every time you run the script?
+# Optional structured results for other tools, saved next to the log (LOG_PATH) with the same auto-incremented naming.
+# RESULTS_FORMAT: None (off), 'ndjson' (one JSON object per line) or 'csv'.
+# Every match is a 'match' row (file, line, column, pattern, context). Every searched file also gets a 'file' row
+# with its status, encoding, bytes scanned, hit count and scan time (seconds), to spot the files that make searches slow.
+RESULTS_FORMAT = None
+RESULTS_NAME = 'findStringMatchesResults'
+
+# Clear the console every time you run the script? (Skipped in worker processes, which import this script again.)
 CLEAR_CONSOLE = True
-if CLEAR_CONSOLE: os.system('cls' if os.name == 'nt' else 'clear')
+if CLEAR_CONSOLE and __name__ == '__main__': os.system('cls' if os.name == 'nt' else 'clear')
 
 # Enables global use of LOG() without needing to pass createLogger() or logFile between functions.
 LOG = lambda *args, **kwargs: None
+
+# Number of matches printed to the console so far (see CONSOLE_MAX_MATCHES).
+CONSOLE_STATE = { 'printed': 0 }
+
+# Open structured results file and its csv writer (see RESULTS_FORMAT).
+RESULTS_STATE = { 'file': None, 'csv': None }
+RESULT_FIELDS = ['type', 'file', 'line', 'column', 'pattern', 'context', 'status', 'encoding', 'bytes', 'hits', 'seconds']
+
+# Byte order marks, longest first (the UTF-32 LE mark starts with the UTF-16 LE one). A UTF-8 BOM is kept as text, like before.
+BYTE_ORDER_MARKS = [
+    (b'\xff\xfe\x00\x00', 'utf-32-le'),
+    (b'\x00\x00\xfe\xff', 'utf-32-be'),
+    (b'\xff\xfe', 'utf-16-le'),
+    (b'\xfe\xff', 'utf-16-be')
+]
 #! ================================
 
 
@@ -91,44 +185,1123 @@ def createLogger(logFile):
     return lambda msg, printMsg=False, skipLogFile=False: logMsg(msg, printMsg, logFile, skipLogFile)
 
 
-def searchFile(filePath, subStr):
+def matchAnyLineBreak(pattern):
+    # Rewrites a regex (bytes) so line breaks also match CRLF files: '\n' becomes '(?:\r?\n)' and '$' becomes '(?=\r?$)'.
+    # Other escapes and character classes are left as they are.
+    result = bytearray()
+    inClass = False
+    classStart = 0
+    i = 0
+
+    while i < len(pattern):
+        char = pattern[i:i + 1]
+
+        if char == b'\\':
+            token = pattern[i:i + 2]
+            # re.escape() turns a newline into a backslash and the newline itself.
+            result += rb'(?:\r?\n)' if token in (rb'\n', b'\\\n') and not inClass else token
+            i += 2
+            continue
+
+        i += 1
+
+        if inClass:
+            # A ']' right after '[' or '[^' is a literal, not the end of the class.
+            inClass = not (char == b']' and i - 1 > classStart)
+            result += char
+        elif char == b'[':
+            inClass = True
+
+            if pattern[i:i + 1] == b'^':
+                char += b'^'
+                i += 1
+
+            classStart = i
+            result += char
+        elif char == b'$':
+            result += rb'(?=\r?$)'
+        elif char == b'\n':
+            result += rb'(?:\r?\n)'
+        else:
+            result += char
+
+    return bytes(result)
+
+
+def escapeTarget(target, ignoreCase):
+    # re.escape() of an exact target's UTF-8 bytes. Bytes regexes only fold ASCII letters, so with IGNORE_CASE every
+    # non-ASCII letter becomes a group of its case variants ('é' -> (?:é|É)).
+    if not ignoreCase or target.isascii():
+        return re.escape(target.encode('utf-8'))
+
+    pattern = b''
+
+    for char in target:
+        variants = [re.escape(variant.encode('utf-8')) for variant in dict.fromkeys((char, char.lower(), char.upper())) if len(variant) == 1]
+        pattern += variants[0] if char.isascii() or len(variants) == 1 else b'(?:' + b'|'.join(variants) + b')'
+
+    return pattern
+
+
+def getTargetLiteral(target, ignoreCase):
+    # Longest piece of an exact target that every match contains as-is (up to ASCII case). Files may break lines with
+    # CRLF, and with IGNORE_CASE non-ASCII letters may be in another case, so both split the target.
+    pieces = re.split('\n|[^\x00-\x7f]' if ignoreCase else '\n', target)
+
+    return max(pieces, key=len).encode('utf-8')
+
+
+def splitGlobalFlags(pattern):
+    # Splits leading inline global flags such as (?i) or (?ms) off a regex (bytes), so the rest can be wrapped.
+    match = re.match(rb'\(\?[aiLmsux]+\)', pattern)
+
+    return (pattern[:match.end()], pattern[match.end():]) if match else (b'', pattern)
+
+
+def compileMatcher(subStr, searchMode=None, ignoreCase=None, wholeWord=None, multiline=None):
+    # All substrings compiled into one alternation regex over raw bytes. It only locates candidate lines,
+    # each candidate line is then checked against every target so each target is reported once per line.
+    # Targets are (target, literal, regex): plain exact searches test 'literal in line', every other mode uses the regex.
+    # literal is UTF-8 text every match must contain (None in regex mode), used by the trigram index and the UTF-16/32
+    # prefilter. For exact targets with line breaks it's the longest line, since files may break lines with CRLF.
+    # Regex targets with groups (and so backreferences) or inline global flags can't share one alternation. Then 'regex'
+    # is None and searchBuffer() locates candidate lines with the per-target regexes instead.
+    # WHOLE_WORD boundaries are not part of the regexes. searchTarget() checks them on the decoded characters.
+    searchMode = SEARCH_MODE if searchMode is None else searchMode
+    ignoreCase = IGNORE_CASE if ignoreCase is None else ignoreCase
+    wholeWord = WHOLE_WORD if wholeWord is None else wholeWord
+    multiline = MULTILINE if multiline is None else multiline
+
+    if searchMode not in ('exact', 'regex'):
+        raise ValueError(f'Unknown SEARCH_MODE: {searchMode}')
+
+    isPlain = searchMode == 'exact' and not (ignoreCase or wholeWord or multiline)
+    flags = (re.IGNORECASE if ignoreCase else 0) | (re.MULTILINE if searchMode == 'regex' else 0)
+    defaultFlags = re.compile(b'', flags).flags
+    canCombine = True
+    targets = []
+    patterns = []
+
+    for target in subStr:
+        targetBytes = target.encode('utf-8')
+        globalFlags, pattern = splitGlobalFlags(targetBytes) if searchMode == 'regex' else (b'', escapeTarget(target, ignoreCase))
+        pattern = matchAnyLineBreak(pattern)
+
+        try:
+            targetRegex = re.compile(globalFlags + pattern, flags)
+        except re.error as error:
+            raise ValueError(f'Invalid regex in SUBSTRINGS: {target!r} ({error})') from None
+
+        canCombine = canCombine and targetRegex.groups == 0 and targetRegex.flags == defaultFlags
+        patterns.append(b'(?:' + pattern + b')')
+        literal = getTargetLiteral(target, ignoreCase) if searchMode == 'exact' else None
+        isPlainTarget = isPlain and b'\n' not in targetBytes
+        targets.append((target, literal, None if isPlainTarget else targetRegex))
+
+    return {
+        'regex': re.compile(b'|'.join(patterns), flags) if canCombine else None,
+        'flags': flags,
+        'targets': targets,
+        'multiline': multiline,
+        'wholeWord': wholeWord
+    }
+
+
+def decodeLine(lineBytes):
+    # Same text as reading the file in text mode: UTF-8, invalid bytes dropped, '\r\n' as '\n'.
+    return lineBytes.replace(b'\r\n', b'\n').decode('utf-8', errors='ignore')
+
+
+def countNewlines(buffer, start, end):
+    # mmap objects have no count(), so large gaps between hits are counted in small slices instead of one big copy.
+    if isinstance(buffer, bytes):
+        return buffer.count(b'\n', start, end)
+
+    count = 0
+
+    for pos in range(start, end, CHUNK_SIZE):
+        count += buffer[pos:min(end, pos + CHUNK_SIZE)].count(b'\n')
+
+    return count
+
+
+def getContextLines(buffer, lineStart, lineEnd, lineNo, contextLines=CONTEXT_LINES):
+    # Returns [(lineNo, text, isHit), ...] for the hit line(s) in [lineStart, lineEnd) and up to contextLines lines on each side.
+    # Only these lines are decoded.
+    start = lineStart
+
+    for _ in range(contextLines):
+        if start == 0:
+            break
+
+        start = buffer.rfind(b'\n', 0, start - 1) + 1
+
+    end = lineEnd
+
+    for _ in range(contextLines):
+        if end >= len(buffer):
+            break
+
+        nextEnd = buffer.find(b'\n', end)
+        end = len(buffer) if nextEnd == -1 else nextEnd + 1
+
+    firstLineNo = lineNo - countNewlines(buffer, start, lineStart)
+    pieces = buffer[start:end].split(b'\n')
+
+    # Every piece but the last ended with a newline. A trailing newline leaves an empty last piece, which is not a line.
+    lines = [piece + b'\n' for piece in pieces[:-1]]
+
+    if pieces[-1]:
+        lines.append(pieces[-1])
+
+    # Multi-line hits mark every line they span.
+    lastHitLineNo = lineNo + countNewlines(buffer, lineStart, lineEnd - 1)
+
+    return [(firstLineNo + i, decodeLine(line), lineNo <= firstLineNo + i <= lastHitLineNo) for i, line in enumerate(lines)]
+
+
+def getColumn(buffer, lineStart, matchStart):
+    # 0-based character column of a match, counted in decoded text like the context lines.
+    return len(decodeLine(buffer[lineStart:matchStart]))
+
+
+def getLineEnd(buffer, pos):
+    # End (after the newline) of the line containing pos.
+    lineEnd = buffer.find(b'\n', pos)
+
+    return len(buffer) if lineEnd == -1 else lineEnd + 1
+
+
+def isWordChar(char):
+    # Same word characters as a str regex's \w.
+    return char.isalnum() or char == '_'
+
+
+def isWordBoundary(buffer, pos):
+    # Unicode-aware \b at a buffer offset: decodes the UTF-8 characters just before and after pos.
+    # A bytes regex's \b sees every non-ASCII byte as a non-word character, so 'caf' would match inside 'café'.
+    start = pos - 1
+
+    while start > 0 and pos - start < 4 and 0x80 <= buffer[start] < 0xc0:
+        start -= 1
+
+    before = buffer[max(start, 0):pos].decode('utf-8', errors='ignore')[-1:]
+    after = buffer[pos:pos + 4].decode('utf-8', errors='ignore')[:1] if pos < len(buffer) else ''
+
+    return isWordChar(before) != isWordChar(after)
+
+
+def searchTarget(targetRegex, buffer, start, end, wholeWord):
+    # targetRegex.search(), but with WHOLE_WORD only matches with a word boundary on both sides count.
+    match = targetRegex.search(buffer, start, end)
+
+    while wholeWord and match and not (isWordBoundary(buffer, match.start()) and isWordBoundary(buffer, match.end())):
+        match = targetRegex.search(buffer, match.start() + 1, end)
+
+    return match
+
+
+def findNextTargetMatch(buffer, pos, searchEnd, matcher, nextStarts):
+    # Start of the earliest match of any target at or after pos, or -1. Used when the targets can't be combined into
+    # one regex (see compileMatcher()). nextStarts caches each target's next match, so a target is only searched
+    # again once pos has moved past it.
+    earliest = -1
+
+    for i, (target, literal, targetRegex) in enumerate(matcher['targets']):
+        if nextStarts[i] is None or (nextStarts[i] != -1 and nextStarts[i] < pos):
+            match = targetRegex.search(buffer, pos, searchEnd)
+            nextStarts[i] = match.start() if match else -1
+
+        if nextStarts[i] != -1 and (earliest == -1 or nextStarts[i] < earliest):
+            earliest = nextStarts[i]
+
+    return earliest
+
+
+def searchBuffer(buffer, scanFrom, scanTo, baseLine, matcher, countFrom=0):
+    # Yields (lineNo, target, lineStart, lineEnd, matchStart) for every target found on a line that starts in [scanFrom, scanTo).
+    # lineEnd is the end of the last line the match spans (multi-line matches may run past scanTo).
+    # matchStart is the buffer offset of the target's first match on the line (see getColumn()).
+    # baseLine is the 0-based line number of the line starting at countFrom. Newlines are only counted up to each hit.
+    # buffer can be bytes or an mmap.
+    regex = matcher['regex']
+    searchEnd = len(buffer) if matcher['multiline'] else scanTo
+    pos = scanFrom
+    countedTo = countFrom
+    lineNo = baseLine
+    # Without a combined regex: start of each target's next match (None = not searched yet, -1 = no more matches).
+    nextStarts = [None] * len(matcher['targets'])
+
+    while pos < scanTo:
+        if regex is not None:
+            match = regex.search(buffer, pos, searchEnd)
+            candidate = match.start() if match else -1
+        else:
+            candidate = findNextTargetMatch(buffer, pos, searchEnd, matcher, nextStarts)
+
+        if candidate == -1 or candidate >= scanTo:
+            break
+
+        lineStart = buffer.rfind(b'\n', 0, candidate) + 1
+        lineEnd = getLineEnd(buffer, candidate)
+
+        lineNo += countNewlines(buffer, countedTo, lineStart)
+        countedTo = lineStart
+        line = buffer[lineStart:lineEnd]
+
+        for target, literal, targetRegex in matcher['targets']:
+            if targetRegex is None:
+                column = line.find(literal)
+
+                if column != -1:
+                    yield lineNo, target, lineStart, lineEnd, lineStart + column
+
+                continue
+
+            # The target has to start on this line, but may end on a later one in multi-line mode.
+            targetMatch = searchTarget(targetRegex, buffer, lineStart, searchEnd if matcher['multiline'] else lineEnd, matcher['wholeWord'])
+
+            if targetMatch and targetMatch.start() < lineEnd:
+                yield lineNo, target, lineStart, getLineEnd(buffer, max(targetMatch.end() - 1, targetMatch.start())), targetMatch.start()
+
+        pos = lineEnd
+
+
+def iterFileMatches(f, matcher, chunkSize=CHUNK_SIZE, contextLines=CONTEXT_LINES):
+    # Reads a binary file in chunks and yields (lineNo, column, target, contextLines) per hit, in file order.
+    # Only lines that already have contextLines complete lines after them are searched, and the last
+    # contextLines lines before the searched part are carried into the next chunk for the leading context.
+    buffer = b''
+    scanFrom = 0
+    baseLine = 0
+
+    while True:
+        chunk = f.read(chunkSize)
+        atEof = not chunk
+        buffer += chunk
+
+        if atEof:
+            scanTo = len(buffer)
+        else:
+            scanTo = len(buffer)
+
+            for _ in range(contextLines + 1):
+                scanTo = buffer.rfind(b'\n', 0, scanTo)
+
+                if scanTo == -1:
+                    break
+
+            # Not enough complete lines yet. Keep reading.
+            if scanTo == -1 or scanTo + 1 <= scanFrom:
+                continue
+
+            scanTo += 1
+
+        for lineNo, target, lineStart, lineEnd, matchStart in searchBuffer(buffer, scanFrom, scanTo, baseLine, matcher):
+            yield lineNo, getColumn(buffer, lineStart, matchStart), target, getContextLines(buffer, lineStart, lineEnd, lineNo, contextLines)
+
+        if atEof:
+            break
+
+        keepFrom = scanTo
+
+        for _ in range(contextLines):
+            if keepFrom == 0:
+                break
+
+            keepFrom = buffer.rfind(b'\n', 0, keepFrom - 1) + 1
+
+        baseLine += buffer.count(b'\n', 0, keepFrom)
+        buffer = buffer[keepFrom:]
+        scanFrom = scanTo - keepFrom
+
+
+def iterMappedMatches(f, matcher, contextLines=CONTEXT_LINES):
+    # Same results as iterFileMatches(), but searches the whole file in place through mmap.
+    # Hits, line numbers, and context are computed lazily from the mapped buffer, so nothing is read into memory up front.
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mappedFile:
+        for lineNo, target, lineStart, lineEnd, matchStart in searchBuffer(mappedFile, 0, len(mappedFile), 0, matcher):
+            yield lineNo, getColumn(mappedFile, lineStart, matchStart), target, getContextLines(mappedFile, lineStart, lineEnd, lineNo, contextLines)
+
+
+def iterFileHits(f, matcher, chunkSize=CHUNK_SIZE):
+    # Count-only version of iterFileMatches(): yields just the target of each hit. No context is kept, so each chunk
+    # is searched up to its last complete line and only the partial line is carried over.
+    buffer = b''
+
+    while True:
+        chunk = f.read(chunkSize)
+        atEof = not chunk
+        buffer += chunk
+        scanTo = len(buffer) if atEof else buffer.rfind(b'\n') + 1
+
+        for lineNo, target, lineStart, lineEnd, matchStart in searchBuffer(buffer, 0, scanTo, 0, matcher):
+            yield target
+
+        if atEof:
+            break
+
+        buffer = buffer[scanTo:]
+
+
+def iterMappedHits(f, matcher):
+    # Count-only version of iterMappedMatches().
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mappedFile:
+        for lineNo, target, lineStart, lineEnd, matchStart in searchBuffer(mappedFile, 0, len(mappedFile), 0, matcher):
+            yield target
+
+
+def iterMatches(f, matcher, countOnly=False):
+    # Picks the chunked reader or mmap depending on the file size.
+    fileSize = os.fstat(f.fileno()).st_size
+
+    if MMAP_THRESHOLD and fileSize >= MMAP_THRESHOLD:
+        return iterMappedHits(f, matcher) if countOnly else iterMappedMatches(f, matcher)
+
+    return iterFileHits(f, matcher) if countOnly else iterFileMatches(f, matcher)
+
+
+def sniffEncoding(head):
+    # Returns (encoding, bomLength) from the first bytes of a file. encoding is None for binary files.
+    for bom, encoding in BYTE_ORDER_MARKS:
+        if head.startswith(bom):
+            return encoding, len(bom)
+
+    if b'\x00' not in head:
+        return 'utf-8', 0
+
+    # Mostly-ASCII UTF-16 text without a BOM has a NUL in every other byte.
+    half = max(len(head) // 2, 1)
+    evenNuls = head[0::2].count(0)
+    oddNuls = head[1::2].count(0)
+
+    if oddNuls > half * 0.3 and evenNuls < half * 0.05:
+        return 'utf-16-le', 0
+
+    if evenNuls > half * 0.3 and oddNuls < half * 0.05:
+        return 'utf-16-be', 0
+
+    return None, 0
+
+
+def sniffFile(f):
+    head = f.read(SNIFF_SIZE)
+    f.seek(0)
+
+    return sniffEncoding(head)
+
+
+def getEncodedPrefilter(matcher, encoding):
+    # The targets' literal text encoded like the file, so a file with no possible hit is never decoded.
+    # Returns None when there is nothing to prefilter with (regex mode). Cached on the matcher per encoding.
+    prefilters = matcher.setdefault('encodedPrefilters', {})
+
+    if encoding not in prefilters:
+        literals = [literal for target, literal, targetRegex in matcher['targets']]
+
+        if not literals or any(literal is None for literal in literals):
+            prefilters[encoding] = None
+        else:
+            flags = matcher['flags'] & re.IGNORECASE
+            encoded = [re.escape(literal.decode('utf-8').encode(encoding)) for literal in literals]
+            prefilters[encoding] = (re.compile(b'|'.join(encoded), flags), max(len(pattern) for pattern in encoded))
+
+    return prefilters[encoding]
+
+
+def iterDecodedMatches(f, matcher, encoding, bomLength, countOnly=False):
+    # UTF-16/UTF-32 files: look for the encoded targets in the raw bytes first. Only files with a possible hit are
+    # decoded (to UTF-8) and searched like any other file. Decoding happens chunk by chunk as the reader asks for more,
+    # so memory stays bounded by CHUNK_SIZE no matter how big the file is.
+    prefilter = getEncodedPrefilter(matcher, encoding)
+
+    if prefilter:
+        regex, overlap = prefilter
+        carry = b''
+        found = False
+
+        while chunk := f.read(CHUNK_SIZE):
+            chunk = carry + chunk
+
+            if regex.search(chunk):
+                found = True
+                break
+
+            carry = chunk[-overlap:]
+
+        if not found:
+            return
+
+    f.seek(bomLength)
+    decodedFile = codecs.EncodedFile(f, 'utf-8', encoding, errors='ignore')
+
+    if countOnly:
+        yield from iterFileHits(decodedFile, matcher)
+    else:
+        yield from iterFileMatches(decodedFile, matcher)
+
+
+def openMatches(f, matcher, countOnly=False):
+    # Returns (encoding, matches) for an open binary file. encoding is None (and there are no matches) for skipped binary files.
+    # With countOnly, matches only yields the target of each hit (see iterFileHits()).
+    encoding, bomLength = sniffFile(f)
+
+    if encoding is None:
+        if SKIP_BINARY_FILES:
+            return None, []
+
+        encoding = 'binary'
+
+    if encoding in ('utf-8', 'binary'):
+        return encoding, iterMatches(f, matcher, countOnly)
+
+    return encoding, iterDecodedMatches(f, matcher, encoding, bomLength, countOnly)
+
+
+def countFileHits(targets, matcher, stopAfter=None):
+    # Returns (counts, stopped). counts is a compact array with one hit counter per matcher target.
+    # stopped is True if the file reached stopAfter hits and the rest of it was not searched.
+    targetIndexes = {}
+
+    for i, (target, literal, targetRegex) in enumerate(matcher['targets']):
+        targetIndexes.setdefault(target, i)
+
+    counts = array('L', [0]) * len(matcher['targets'])
+    total = 0
+
+    for target in targets:
+        counts[targetIndexes[target]] += 1
+        total += 1
+
+        if stopAfter and total >= stopAfter:
+            return counts, True
+
+    return counts, False
+
+
+def formatMatch(filePath, lineNo, target, context):
+    # One match block: header, surrounding context, and separator.
+    lines = [f'\n[FOUND] Str: {target} - Line: {lineNo+1}  ||  File: {filePath.replace("\\", "/")}\n\n']
+
+    for j, text, isHit in context:
+        prefix = '>> ' if isHit else '   '
+        lines.append(f'{prefix}Line {j+1:04}: {text}')
+
+    lines.append('\n' + ('=' * 80))
+
+    return '\n'.join(lines)
+
+
+def getNextResultsFilePath(resultsFolder, resultsName, resultsFormat):
+    if resultsFolder:
+        resultsPath = os.path.abspath(resultsFolder)
+    else:
+        resultsPath = os.path.dirname(os.path.abspath(__file__))
+
+    os.makedirs(resultsPath, exist_ok=True)
+    resultsNumber = 1
+
+    while True:
+        fullResultsPath = os.path.join(resultsPath, f'{resultsName}_{resultsNumber}.{resultsFormat}')
+
+        if not os.path.exists(fullResultsPath):
+            return fullResultsPath
+
+        resultsNumber += 1
+
+
+def openResultsFile(resultsFilePath, resultsFormat):
+    if resultsFormat not in ('ndjson', 'csv'):
+        raise ValueError(f'Unknown RESULTS_FORMAT: {resultsFormat}')
+
+    # Kept open for the whole run. Rows are small and frequent.
+    RESULTS_STATE['file'] = open(resultsFilePath, 'w', encoding='utf-8', newline='')
+
+    if resultsFormat == 'csv':
+        RESULTS_STATE['csv'] = csv.DictWriter(RESULTS_STATE['file'], fieldnames=RESULT_FIELDS)
+        RESULTS_STATE['csv'].writeheader()
+
+
+def closeResultsFile():
+    if RESULTS_STATE['file']:
+        RESULTS_STATE['file'].close()
+
+    RESULTS_STATE['file'] = None
+    RESULTS_STATE['csv'] = None
+
+
+def writeResultRow(row):
+    # NDJSON rows only carry their own fields. CSV rows leave the other columns empty.
+    if RESULTS_STATE['csv']:
+        RESULTS_STATE['csv'].writerow(row)
+    else:
+        RESULTS_STATE['file'].write(json.dumps(row, ensure_ascii=False) + '\n')
+
+
+def writeMatchRow(filePath, lineNo, column, target, context):
+    writeResultRow({
+        'type': 'match',
+        'file': filePath,
+        'line': lineNo + 1,
+        'column': column + 1,
+        'pattern': target,
+        'context': ''.join(text for j, text, isHit in context).rstrip('\n')
+    })
+
+
+def writeCountRows(filePath, matcher, counts):
+    # Count-only mode: one row per pattern found in the file.
+    if not RESULTS_STATE['file']:
+        return
+
+    for (target, literal, targetRegex), hits in zip(matcher['targets'], counts):
+        if hits:
+            writeResultRow({ 'type': 'count', 'file': filePath, 'pattern': target, 'hits': hits })
+
+
+def writeFileRow(filePath, status, encoding, bytesScanned, hits, seconds):
+    # One summary row per file. status is 'searched', 'stopped' (COUNT_STOP_AFTER reached), 'skipped' (binary) or 'error'.
+    if not RESULTS_STATE['file']:
+        return
+
+    writeResultRow({
+        'type': 'file',
+        'file': filePath,
+        'status': status,
+        'encoding': encoding,
+        'bytes': bytesScanned,
+        'hits': hits,
+        'seconds': round(seconds, 6)
+    })
+
+
+def logFileMatches(filePath, matches):
+    # Collects one file's match blocks and writes them to the log in batches instead of one open/close per line.
+    # The console only gets the first CONSOLE_MAX_MATCHES blocks of the run, then a summary line per file.
+    # Returns the number of matches.
+    blocks = []
+    hidden = 0
+    hits = 0
+
+    try:
+        for lineNo, column, target, context in matches:
+            block = formatMatch(filePath, lineNo, target, context)
+            blocks.append(block)
+            hits += 1
+
+            if RESULTS_STATE['file']:
+                writeMatchRow(filePath, lineNo, column, target, context)
+
+            if CONSOLE_MAX_MATCHES is None or CONSOLE_STATE['printed'] < CONSOLE_MAX_MATCHES:
+                LOG(block, True, skipLogFile=True)
+                CONSOLE_STATE['printed'] += 1
+            else:
+                hidden += 1
+
+            if len(blocks) >= MATCH_BATCH_SIZE:
+                LOG('\n'.join(blocks))
+                blocks.clear()
+    finally:
+        if blocks:
+            LOG('\n'.join(blocks))
+
+        if hidden:
+            LOG(f'[FOUND] {hidden:,} more matches in {filePath.replace("\\", "/")} (console limit reached, see log file).', True, skipLogFile=True)
+
+    return hits
+
+
+def logReadError(filePath, error):
+    LOG(f'[ERROR] Could not read file: {filePath.replace("\\", "/")}  ||  Reason: {error}', True)
+
+
+def logSkippedFile(filePath):
+    LOG(f'[SKIPPED] Binary file: {filePath.replace("\\", "/")}')
+
+
+def recordFileCounts(countMatrix, filePath, matcher, counts, stopped):
+    # Only files with hits are kept in the matrix.
+    if any(counts):
+        countMatrix[filePath] = (counts, stopped)
+
+    writeCountRows(filePath, matcher, counts)
+
+
+def searchFile(filePath, subStr, matcher=None, countMatrix=None):
+    # matcher is the compiled form of subStr (see compileMatcher()). Compiled here if not given.
+    # With countMatrix (count-only mode), hits are only counted into countMatrix[filePath] instead of logged.
+    if matcher is None:
+        matcher = compileMatcher(subStr)
+
+    startTime = time.perf_counter()
+    countOnly = countMatrix is not None
+
+    try:
+        with open(filePath, 'rb') as f:
+            encoding, matches = openMatches(f, matcher, countOnly)
+
+            # Search the file for any of the target strings.
+            if encoding is None:
+                logSkippedFile(filePath)
+                writeFileRow(filePath, 'skipped', None, 0, 0, time.perf_counter() - startTime)
+            elif countOnly:
+                counts, stopped = countFileHits(matches, matcher, COUNT_STOP_AFTER)
+                recordFileCounts(countMatrix, filePath, matcher, counts, stopped)
+                writeFileRow(filePath, 'stopped' if stopped else 'searched', encoding, os.fstat(f.fileno()).st_size, sum(counts), time.perf_counter() - startTime)
+            else:
+                hits = logFileMatches(filePath, matches)
+                writeFileRow(filePath, 'searched', encoding, os.fstat(f.fileno()).st_size, hits, time.perf_counter() - startTime)
+    except Exception as e:
+        logReadError(filePath, str(e))
+        writeFileRow(filePath, 'error', None, 0, 0, time.perf_counter() - startTime)
+
+
+def iterSearchFiles(basePath, validExtensions, recursiveSearch=True):
+    # Yields every file to search under one base path, in the same order for sequential and parallel runs.
+    for root, dirs, files in os.walk(basePath):
+        for file in files:
+            if any(file.lower().endswith(ext) for ext in validExtensions):
+                yield os.path.join(root, file)
+
+        if not recursiveSearch:
+            break  # Only process top-level if not recursive.
+
+
+def getFileRanges(filePath, splitSize=SPLIT_SIZE):
+    # Splits a large file into (start, end) byte ranges of about splitSize, each starting at a line start.
+    # Returns [(0, None)] (the whole file) for files that are not split.
+    try:
+        fileSize = os.path.getsize(filePath)
+    except OSError:
+        return [(0, None)]
+
+    if fileSize <= splitSize:
+        return [(0, None)]
+
+    starts = [0]
+
+    with open(filePath, 'rb') as f:
+        # Only UTF-8 files are split. Other encodings are searched whole.
+        if sniffFile(f)[0] != 'utf-8':
+            return [(0, None)]
+
+        while starts[-1] + splitSize < fileSize:
+            # Move the cut to the start of the next line.
+            f.seek(starts[-1] + splitSize)
+            f.readline()
+
+            if f.tell() >= fileSize:
+                break
+
+            starts.append(f.tell())
+
+    return [(start, end) for start, end in zip(starts, starts[1:] + [fileSize])]
+
+
+def searchFileTask(task):
+    # Runs in a worker process. Returns (hits, newlineCount, error, encoding, bytesScanned, seconds) for one file or one
+    # byte range of a file. Line numbers are relative to the range start. newlineCount lets the main process shift the
+    # following ranges. encoding is None for skipped binary files.
+    # In count-only mode hits is (counts, stopped) from countFileHits() instead of a list of hits.
+    filePath, start, end, matcher, countOnly = task
+    startTime = time.perf_counter()
+
     try:
-        with open(filePath, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
+        with open(filePath, 'rb') as f:
+            if end is None:
+                encoding, matches = openMatches(f, matcher, countOnly)
+                hits = countFileHits(matches, matcher, COUNT_STOP_AFTER) if countOnly else list(matches)
+                bytesScanned = os.fstat(f.fileno()).st_size if encoding else 0
 
-        # Read each line and search for any of the target strings (case-insensitive exact matches).
-        for i, line in enumerate(lines):
-            for target in subStr:
-                if target in line:
-                    LOG(f'\n[FOUND] Str: {target} - Line: {i+1}  ||  File: {filePath.replace("\\", "/")}\n\n', True)
+                return hits, 0, None, encoding, bytesScanned, time.perf_counter() - startTime
 
-                    # Write surrounding context.
-                    start = max(0, i - 4)
-                    end = min(len(lines), i + 5)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mappedFile:
+                if countOnly:
+                    targets = (target for lineNo, target, lineStart, lineEnd, matchStart in searchBuffer(mappedFile, start, end, 0, matcher, start))
 
-                    for j in range(start, end):
-                        prefix = '>> ' if j == i else '   '
-                        LOG(f'{prefix}Line {j+1:04}: {lines[j]}', True)
+                    return countFileHits(targets, matcher, COUNT_STOP_AFTER), 0, None, 'utf-8', end - start, time.perf_counter() - startTime
 
-                    LOG('\n' + ('=' * 80), True)
+                hits = [
+                    (lineNo, getColumn(mappedFile, lineStart, matchStart), target, getContextLines(mappedFile, lineStart, lineEnd, lineNo))
+                    for lineNo, target, lineStart, lineEnd, matchStart in searchBuffer(mappedFile, start, end, 0, matcher, start)
+                ]
+
+                return hits, countNewlines(mappedFile, start, end), None, 'utf-8', end - start, time.perf_counter() - startTime
     except Exception as e:
-        LOG(f'[ERROR] Could not read file: {filePath.replace("\\", "/")}  ||  Reason: {str(e)}', True)
+        return [], 0, str(e), 'utf-8', 0, time.perf_counter() - startTime
+
+
+def flushParallelSummary(summary, fileCounts, countMatrix, matcher):
+    # Writes a finished file's summary row (and its counts in count-only mode).
+    if fileCounts:
+        counts, stopped = fileCounts
+        recordFileCounts(countMatrix, summary[0], matcher, counts, stopped)
+
+        if stopped:
+            summary[1] = 'stopped'
+
+    writeFileRow(*summary)
 
 
-def scanPaths(searchPath, validExtensions, subStrings, recursiveSearch=True):
-    for basePath in searchPath:
-        if not os.path.exists(basePath):
-            LOG(f'[WARNING] Path does not exist: {basePath}', True)
+def searchFilesParallel(pool, filePaths, matcher, countMatrix=None):
+    # Files (and byte ranges of large files) are searched in the process pool. pool.map() returns results in
+    # submission order, so hits are logged in the same path/line order as the sequential search.
+    # Split files get one summary row with the totals of all their ranges (seconds is the summed worker time).
+    # In count-only mode (countMatrix given) the counts of a split file's ranges are added up.
+    countOnly = countMatrix is not None
+    tasks = [(filePath, start, end, matcher, countOnly) for filePath in filePaths for start, end in getFileRanges(filePath)]
+    lineOffset = 0
+    errorLogged = None
+    summary = None
+    fileCounts = None
+
+    for (filePath, start, end, _, _), (hits, newlineCount, error, encoding, bytesScanned, seconds) in zip(tasks, pool.map(searchFileTask, tasks, chunksize=8)):
+        if start == 0:
+            lineOffset = 0
+
+            if summary:
+                flushParallelSummary(summary, fileCounts, countMatrix, matcher)
+
+            summary = [filePath, 'searched', encoding, 0, 0, 0.0]
+            fileCounts = None
+
+        summary[5] += seconds
+
+        if error or errorLogged == filePath:
+            # A split file reports its error once and skips its remaining ranges.
+            if errorLogged != filePath:
+                logReadError(filePath, error)
+                errorLogged = filePath
+                summary[1:5] = ['error', None, 0, 0]
+                fileCounts = None
+
             continue
 
-        for root, dirs, files in os.walk(basePath):
-            for file in files:
-                if any(file.lower().endswith(ext) for ext in validExtensions):
-                    fullPath = os.path.join(root, file)
-                    searchFile(fullPath, subStrings)
+        if encoding is None:
+            logSkippedFile(filePath)
+            summary[1] = 'skipped'
+            continue
+
+        if countOnly:
+            counts, stopped = hits
+
+            if fileCounts:
+                fileCounts = (array('L', map(sum, zip(fileCounts[0], counts))), fileCounts[1] or stopped)
+            else:
+                fileCounts = (counts, stopped)
+
+            summary[4] += sum(counts)
+        elif hits:
+            shiftedHits = [(lineNo + lineOffset, column, target, [(j + lineOffset, text, isHit) for j, text, isHit in context]) for lineNo, column, target, context in hits]
+            summary[4] += logFileMatches(filePath, shiftedHits)
+
+        summary[3] += bytesScanned
+        lineOffset += newlineCount
+
+    if summary:
+        flushParallelSummary(summary, fileCounts, countMatrix, matcher)
+
+
+def getIndexFilePath(indexFolder, indexFileName):
+    if indexFolder:
+        indexPath = os.path.abspath(indexFolder)
+    else:
+        indexPath = os.path.dirname(os.path.abspath(__file__))
+
+    os.makedirs(indexPath, exist_ok=True)
+
+    return os.path.join(indexPath, indexFileName)
+
+
+def newSearchIndex():
+    # files: { filePath: (fileId, mtime, size) }. fileId is None for files that are not indexed (always searched).
+    # The postings (ids of the files containing each trigram) are three flat arrays so the index loads as a few blobs:
+    # trigrams (sorted, packed into ints, see getTrigrams()), starts (offset of each trigram's ids), and ids (ascending per trigram).
+    # Files indexed during a run go to added ({ trigram: array of fileIds }) until packPostings() merges them in.
+    # Changed and deleted files leave their old ids in the postings until packPostings() renumbers the live ones.
+    return { 'files': {}, 'trigrams': array('I'), 'starts': array('Q', [0]), 'ids': array('I'), 'added': {}, 'nextId': 0 }
+
+
+def loadSearchIndex(indexFilePath):
+    if not os.path.isfile(indexFilePath):
+        return newSearchIndex()
+
+    try:
+        with open(indexFilePath, 'rb') as f:
+            version, index = pickle.load(f)
+    except Exception as e:
+        LOG(f'[INDEX] Cannot read {indexFilePath} - {e}. Rebuilding it.', True)
+        return newSearchIndex()
+
+    return index if version == 2 else newSearchIndex()
+
+
+def getPosting(index, trigram):
+    # Ids of the files containing trigram when the index was loaded, or None if no file has it.
+    trigrams = index['trigrams']
+    i = bisect_left(trigrams, trigram)
+
+    if i == len(trigrams) or trigrams[i] != trigram:
+        return None
+
+    return index['ids'][index['starts'][i]:index['starts'][i + 1]]
+
+
+def packPostings(index, newIds=None):
+    # Merges the added postings into the flat arrays. With newIds ({ oldId: newId }), ids missing from it are
+    # dropped and the rest renumbered. Ids keep their order, so every posting stays sorted.
+    added = index['added']
+    oldStarts = index['starts']
+    oldIds = index['ids']
+    positions = { trigram: i for i, trigram in enumerate(index['trigrams']) }
+    trigrams = array('I')
+    starts = array('Q', [0])
+    ids = array('I')
+
+    for trigram in sorted(positions.keys() | added.keys()):
+        i = positions.get(trigram)
+        posting = oldIds[oldStarts[i]:oldStarts[i + 1]] if i is not None else array('I')
+
+        if trigram in added:
+            posting += added[trigram]
+
+        if newIds is not None:
+            posting = array('I', (newIds[fileId] for fileId in posting if fileId in newIds))
+
+        if posting:
+            trigrams.append(trigram)
+            ids += posting
+            starts.append(len(ids))
+
+    index.update({ 'trigrams': trigrams, 'starts': starts, 'ids': ids, 'added': {} })
+
+
+def saveSearchIndex(indexFilePath, index, seenPaths, reindexed):
+    # Files not seen in this run (deleted, or outside SEARCH_PATHS) are dropped. Nothing is written if nothing changed.
+    files = { filePath: entry for filePath, entry in index['files'].items() if filePath in seenPaths }
+
+    if not reindexed and len(files) == len(index['files']):
+        return
+
+    index['files'] = files
+    liveIds = sorted(entry[0] for entry in files.values() if entry[0] is not None)
+
+    # Once stale ids outnumber the live ones, the live ids are renumbered from 0 and the stale ones dropped.
+    if index['nextId'] > 2 * len(liveIds):
+        newIds = { oldId: newId for newId, oldId in enumerate(liveIds) }
+        packPostings(index, newIds)
+        index['files'] = {
+            filePath: (None if fileId is None else newIds[fileId], mtime, size)
+            for filePath, (fileId, mtime, size) in files.items()
+        }
+        index['nextId'] = len(liveIds)
+    else:
+        packPostings(index)
+
+    # Written to a temporary file first so an interrupted run never leaves a broken index behind.
+    tempPath = indexFilePath + '.tmp'
+
+    with open(tempPath, 'wb') as f:
+        pickle.dump((2, index), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    os.replace(tempPath, indexFilePath)
+
+
+def getTrigrams(data):
+    # Every 3-byte sequence packed into an int (24 bits). Lowercased so the same index also works for case-insensitive queries.
+    data = data.lower()
+
+    return { int.from_bytes(trigram, 'big') for trigram in { data[i:i + 3] for i in range(len(data) - 2) } }
+
+
+def getFileTrigrams(filePath):
+    # Returns None for files that are not UTF-8, so they are always searched.
+    trigrams = set()
+    carry = b''
+
+    with open(filePath, 'rb') as f:
+        if sniffFile(f)[0] != 'utf-8':
+            return None
+
+        while chunk := f.read(CHUNK_SIZE):
+            # Keep the last 2 bytes so trigrams across chunk borders are not lost.
+            chunk = carry + chunk
+            trigrams.update(getTrigrams(chunk))
+            carry = chunk[-2:]
+
+    return trigrams
+
+
+def getQueryTrigrams(matcher):
+    # One trigram set per target. Returns None if any target is too short to narrow anything down.
+    # Regex targets have no literal text to look up.
+    targets = matcher['targets']
+
+    if not targets or any(literal is None for target, literal, targetRegex in targets):
+        return None
+
+    queryTrigrams = [getTrigrams(literal) for target, literal, targetRegex in targets]
+
+    if any(not trigrams for trigrams in queryTrigrams):
+        return None
+
+    return queryTrigrams
+
+
+def getCandidateIds(index, queryTrigrams):
+    # Ids of the indexed files that have all trigrams of at least one target. Shortest postings are intersected first.
+    candidateIds = set()
+
+    for query in queryTrigrams:
+        fileIdLists = [getPosting(index, trigram) for trigram in query]
+
+        if any(fileIds is None for fileIds in fileIdLists):
+            continue
+
+        fileIdLists.sort(key=len)
+        fileIds = set(fileIdLists[0])
+
+        for otherIds in fileIdLists[1:]:
+            if not fileIds:
+                break
+
+            fileIds.intersection_update(otherIds)
+
+        candidateIds |= fileIds
+
+    return candidateIds
+
+
+def addIndexedFile(index, trigrams):
+    # New ids are always the highest so far, so appending keeps every posting sorted.
+    fileId = index['nextId']
+    index['nextId'] += 1
+    postings = index['added']
+
+    for trigram in trigrams:
+        fileIds = postings.get(trigram)
+
+        if fileIds is None:
+            postings[trigram] = array('I', [fileId])
+        else:
+            fileIds.append(fileId)
+
+    return fileId
+
+
+def filterIndexedFiles(filePaths, index, seenPaths, queryTrigrams, candidateIds, stats):
+    # Yields only the files that may contain a target: all of some target's trigrams appear in the file.
+    # Unchanged files are looked up in candidateIds (see getCandidateIds()). Changed or new files are re-indexed
+    # on the way and checked against their own trigrams. Every seen file is added to seenPaths.
+    files = index['files']
+
+    for filePath in filePaths:
+        stats['files'] += 1
+
+        try:
+            st = os.stat(filePath)
+            entry = files.get(filePath)
+
+            if not entry or entry[1] != st.st_mtime_ns or entry[2] != st.st_size:
+                trigrams = getFileTrigrams(filePath) if st.st_size <= INDEX_MAX_FILE_SIZE else None
+                fileId = None if trigrams is None else addIndexedFile(index, trigrams)
+                files[filePath] = (fileId, st.st_mtime_ns, st.st_size)
+                stats['indexed'] += 1
+                isCandidate = trigrams is None or any(query <= trigrams for query in queryTrigrams)
+            else:
+                isCandidate = entry[0] is None or entry[0] in candidateIds
+        except Exception:
+            # Let the search report the read error.
+            stats['candidates'] += 1
+            yield filePath
+            continue
+
+        seenPaths.add(filePath)
+
+        if isCandidate:
+            stats['candidates'] += 1
+            yield filePath
+
+
+def logCountMatrix(countMatrix, matcher):
+    # Totals per pattern go to the console. The full pattern x file matrix only goes to the log file.
+    LOG('\n[COUNT] Hits per pattern:', True)
+
+    for i, (target, literal, targetRegex) in enumerate(matcher['targets']):
+        hits = sum(counts[i] for counts, stopped in countMatrix.values())
+        files = sum(1 for counts, stopped in countMatrix.values() if counts[i])
+        LOG(f'    {target}: {hits:,} hits in {files:,} files', True)
+
+    stoppedFiles = sum(1 for counts, stopped in countMatrix.values() if stopped)
+
+    if stoppedFiles:
+        LOG(f'    NOTE: {stoppedFiles:,} files stopped at COUNT_STOP_AFTER ({COUNT_STOP_AFTER:,}) hits, so these totals are lower bounds.', True)
+
+    LOG('\n[COUNT] Hits per file:')
+
+    for filePath, (counts, stopped) in countMatrix.items():
+        found = ', '.join(f'{target}: {hits:,}' for (target, literal, targetRegex), hits in zip(matcher['targets'], counts) if hits)
+        LOG(f'    {filePath.replace("\\", "/")}  ||  {found}{"  (stopped early)" if stopped else ""}')
+
+
+def scanPaths(searchPath, validExtensions, subStrings, recursiveSearch=True, workers=1, resultsFormat=None, countOnly=False):
+    # Compile all substrings once for the whole run.
+    matcher = compileMatcher(subStrings)
+    # Count-only mode: { filePath: (counts, stopped) } for files with hits. counts has one counter per target.
+    countMatrix = {} if countOnly else None
+
+    if resultsFormat:
+        resultsFilePath = getNextResultsFilePath(LOG_PATH, RESULTS_NAME, resultsFormat)
+        openResultsFile(resultsFilePath, resultsFormat)
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    # Optional trigram index. Only files that may contain a target are searched.
+    # Queries without usable literal text can't be narrowed down, so the index is not read, updated or saved for them.
+    queryTrigrams = getQueryTrigrams(matcher) if USE_SEARCH_INDEX else None
+    useIndex = queryTrigrams is not None
+
+    if USE_SEARCH_INDEX and not useIndex:
+        LOG('[INDEX] Skipped: regex mode or a target shorter than 3 bytes. Searching every file.', True)
+
+    if useIndex:
+        indexFilePath = getIndexFilePath(INDEX_PATH, INDEX_NAME)
+        index = loadSearchIndex(indexFilePath)
+        candidateIds = getCandidateIds(index, queryTrigrams)
+        seenPaths = set()
+        indexStats = { 'files': 0, 'indexed': 0, 'candidates': 0 }
+
+    try:
+        for basePath in searchPath:
+            if not os.path.exists(basePath):
+                LOG(f'[WARNING] Path does not exist: {basePath}', True)
+                continue
+
+            filePaths = iterSearchFiles(basePath, validExtensions, recursiveSearch)
+
+            if useIndex:
+                filePaths = filterIndexedFiles(filePaths, index, seenPaths, queryTrigrams, candidateIds, indexStats)
+
+            if pool:
+                searchFilesParallel(pool, filePaths, matcher, countMatrix)
+            else:
+                for fullPath in filePaths:
+                    searchFile(fullPath, subStrings, matcher, countMatrix)
+    finally:
+        if pool:
+            pool.shutdown()
+
+        closeResultsFile()
+
+    if countOnly:
+        logCountMatrix(countMatrix, matcher)
+
+    if useIndex:
+        saveSearchIndex(indexFilePath, index, seenPaths, indexStats['indexed'])
+        LOG(f'[INDEX] {indexStats["candidates"]:,} of {indexStats["files"]:,} files searched ({indexStats["indexed"]:,} re-indexed).', True)
 
-            if not recursiveSearch:
-                break  # Only process top-level if not recursive.
+    if resultsFormat:
+        LOG(f'[RESULTS] Saved to "{resultsFilePath.replace("\\", "/")}"', True)
 
 
 if __name__ == '__main__':
@@ -139,7 +1312,7 @@ if __name__ == '__main__':
     try:
         LOG(f'[START] Script started at {datetime.now().strftime("%m/%d/%y %I:%M:%S %p")}.\n', True)
 
-        scanPaths(SEARCH_PATHS, VALID_EXTENSIONS, SUBSTRINGS, RECURSIVE_SEARCH)
+        scanPaths(SEARCH_PATHS, VALID_EXTENSIONS, SUBSTRINGS, RECURSIVE_SEARCH, SEARCH_WORKERS, RESULTS_FORMAT, COUNT_ONLY)
 
         if USE_LOG_FILE:
             LOG(f'\nLogs saved to "{logFile.replace("\\", "/")}"', True)
@@ -1,7 +1,7 @@
 # Run by:  python labelFoldersWithFileCounts.py
 # Renames each top-level folder inside the input path by appending a summary of its contents:
 # - Number of files it contains (including subdirectories)
-# - Total size on disk (true allocated size, not just file sizes)
+# - Total size on disk (true allocated size, not just file sizes). Hard-linked files are counted once per folder.
 # Useful for visually comparing folder content sizes directly from the filesystem.
 
 # Imports
@@ -33,6 +33,9 @@ if CLEAR_CONSOLE: os.system('cls' if os.name == 'nt' else 'clear')
 
 # Enables global use of LOG() without needing to pass createLogger() or logFile between functions.
 LOG = lambda *args, **kwargs: None
+
+# Cluster size per volume (Windows only). Looked up once per volume instead of once per folder.
+CLUSTER_SIZE_CACHE = {}
 #! ================================
 
 
@@ -100,9 +103,13 @@ def folderAlreadyLabeled(name):
 
 
 def getClusterSize(path):
+    rootPath = os.path.splitdrive(path)[0] + '\\'
+
+    if rootPath in CLUSTER_SIZE_CACHE:
+        return CLUSTER_SIZE_CACHE[rootPath]
+
     sectorsPerCluster = ctypes.c_ulong()
     bytesPerSector = ctypes.c_ulong()
-    rootPath = os.path.splitdrive(path)[0] + '\\'
 
     res = ctypes.windll.kernel32.GetDiskFreeSpaceW(
         ctypes.c_wchar_p(rootPath),
@@ -114,30 +121,52 @@ def getClusterSize(path):
     if res == 0:
         raise ctypes.WinError()
 
-    return sectorsPerCluster.value * bytesPerSector.value
+    CLUSTER_SIZE_CACHE[rootPath] = sectorsPerCluster.value * bytesPerSector.value
+
+    return CLUSTER_SIZE_CACHE[rootPath]
 
 
-def getTrueSizeOnDisk(filePath, clusterSize):
-    actualSize = os.path.getsize(filePath)
+def getTrueSizeOnDisk(st, clusterSize):
+    # POSIX: allocated size from the file's lstat (st_blocks is always in 512-byte units).
+    if os.name != 'nt':
+        return st.st_blocks * 512
 
-    return ((actualSize + clusterSize - 1) // clusterSize) * clusterSize
+    # Windows: round the byte size up to the volume's cluster size.
+    return ((st.st_size + clusterSize - 1) // clusterSize) * clusterSize
 
 
 def getFolderInfoTrueDiskUsage(path):
+    # Returns (fileCount, apparentAllocated, uniqueAllocated).
+    # Hard-linked files share one inode, so the unique total counts each (st_dev, st_ino) only once.
     fileCount = 0
-    totalAllocated = 0
-    clusterSize = getClusterSize(path)
+    apparentAllocated = 0
+    uniqueAllocated = 0
+    seenInodes = set()
+    clusterSize = getClusterSize(path) if os.name == 'nt' else 0
 
     for root, dirs, files in os.walk(path):
         for f in files:
             try:
                 fp = os.path.join(root, f)
-                totalAllocated += getTrueSizeOnDisk(fp, clusterSize)
+                st = os.lstat(fp)
+                allocated = getTrueSizeOnDisk(st, clusterSize)
+                apparentAllocated += allocated
                 fileCount += 1
+
+                # Only files with more than one link can be shared. Packed into one int to keep the set compact.
+                if st.st_nlink > 1:
+                    inode = (st.st_dev << 64) | st.st_ino
+
+                    if inode in seenInodes:
+                        continue
+
+                    seenInodes.add(inode)
+
+                uniqueAllocated += allocated
             except Exception as e:
                 LOG(f'Error reading file: {fp} → {e}', True)
 
-    return fileCount, totalAllocated
+    return fileCount, apparentAllocated, uniqueAllocated
 
 
 def main(inPath):
@@ -146,10 +175,13 @@ def main(inPath):
         folderPath = os.path.join(inPath, folder)
 
         if os.path.isdir(folderPath) and not folderAlreadyLabeled(folder):
-            fileCount, totalBytes = getFolderInfoTrueDiskUsage(folderPath)
+            fileCount, apparentBytes, totalBytes = getFolderInfoTrueDiskUsage(folderPath)
             fileCountStr = formatNumber(fileCount)
             sizeStr = formatFileSize(totalBytes)
 
+            if apparentBytes != totalBytes:
+                LOG(f'{folder} → Hard links: {formatFileSize(apparentBytes)} apparent, {sizeStr} unique', True)
+
             if RENAME_FILES:
                 newName = f'{folder} ({fileCountStr} Files, {sizeStr})'
                 newPath = os.path.join(inPath, newName)